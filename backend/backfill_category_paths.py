@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Populate the materialized categoryPath on every product
+Run this once after upgrading, or after importing products outside the API
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.category_paths import backfill_category_paths
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main():
+    print("🔧 Backfilling product category paths...")
+    updated = await backfill_category_paths(db)
+    print(f"✅ Done: {updated} products updated")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
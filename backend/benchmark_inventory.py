@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for checkout stock reservation
+Usage: python benchmark_inventory.py [--stock 100] [--checkouts 500] [--quantity 1]
+
+Creates a temporary product, fires all checkouts at it concurrently through
+utils.inventory and verifies that no unit was sold twice: successful
+reservations must equal min(checkouts, stock // quantity), the final stock
+must be what is left, and inStock must be false when it reaches zero.
+The temporary product is deleted afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.inventory import InsufficientStock, reserve_stock, confirm_reservation
+
+async def run_benchmark(db, stock: int, checkouts: int, quantity: int) -> dict:
+    product_id = f"benchmark-{uuid.uuid4().hex}"
+    await db.products.insert_one({
+        "_id": product_id,
+        "name": "Inventory benchmark product",
+        "price": 1.0,
+        "stock": stock,
+        "inStock": stock > 0
+    })
+    latencies = []
+
+    async def checkout(n: int) -> bool:
+        reservation_id = f"bench-{n}"
+        lines = {product_id: quantity}
+        started = time.perf_counter()
+        try:
+            await reserve_stock(db, lines, reservation_id)
+            await confirm_reservation(db, lines, reservation_id)
+            return True
+        except InsufficientStock:
+            return False
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(checkout(n) for n in range(checkouts)))
+        elapsed = time.perf_counter() - started
+        product = await db.products.find_one({"_id": product_id})
+    finally:
+        await db.products.delete_one({"_id": product_id})
+
+    latencies.sort()
+    succeeded = sum(results)
+    expected = min(checkouts, stock // quantity)
+    return {
+        "succeeded": succeeded,
+        "rejected": checkouts - succeeded,
+        "expected": expected,
+        "finalStock": product["stock"],
+        "expectedStock": stock - expected * quantity,
+        "inStock": product["inStock"],
+        "leftoverReservations": len(product.get("reservations") or []),
+        "elapsedSeconds": round(elapsed, 3),
+        "checkoutsPerSecond": round(checkouts / elapsed, 1) if elapsed else 0.0,
+        "p50Ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99Ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+async def main(args):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], maxPoolSize=args.pool_size)
+    db = client[os.environ['DB_NAME']]
+
+    print(f"🔧 {args.checkouts} concurrent checkouts of {args.quantity} unit(s) against stock {args.stock}...")
+    report = await run_benchmark(db, args.stock, args.checkouts, args.quantity)
+    client.close()
+
+    for key, value in report.items():
+        print(f"   {key}: {value}")
+
+    consistent = (
+        report["succeeded"] == report["expected"]
+        and report["finalStock"] == report["expectedStock"]
+        and report["inStock"] == (report["finalStock"] > 0)
+        and report["leftoverReservations"] == 0
+    )
+    print("✅ No overselling" if consistent else "❌ Inconsistent stock - reservations were lost or duplicated")
+    return consistent
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stock reservation concurrency benchmark")
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--pool-size", type=int, default=200)
+    ok = asyncio.run(main(parser.parse_args()))
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk import products from a CSV or NDJSON supplier feed
+Usage: python import_products.py feed.csv [--key sku|slug] [--batch-size 1000]
+
+Rows are upserted by SKU (or slug). A running server keeps serving cached
+listings and its search index until the caches expire or it is restarted;
+use POST /api/products/import to have the server refresh them immediately.
+"""
+import argparse
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.product_import import (
+    ProductImporter, IMPORT_FORMATS, IMPORT_KEYS, DEFAULT_BATCH_SIZE, detect_format, iter_rows
+)
+
+# MongoDB connection
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+async def main(args):
+    file_format = args.format or detect_format(args.path)
+    if file_format not in IMPORT_FORMATS:
+        print("❌ Unknown file format. Use a .csv or .ndjson file or pass --format")
+        return
+    
+    print(f"🔧 Importing {args.path} ({file_format}, key={args.key}, batch={args.batch_size})...")
+    importer = ProductImporter(db, key=args.key, batch_size=args.batch_size)
+    with open(args.path, "rb") as stream:
+        report = await importer.run(iter_rows(stream, file_format))
+    
+    print(f"✅ Done: {report['processed']} rows in {report['elapsedSeconds']}s ({report['rowsPerSecond']} rows/s)")
+    print(f"   Inserted: {report['inserted']}  Updated: {report['updated']}  Failed: {report['failed']}")
+    for error in report["errors"]:
+        print(f"   ❌ Line {error['line']}: {error['error']}")
+    if report["failed"] > len(report["errors"]):
+        print(f"   ... and {report['failed'] - len(report['errors'])} more errors")
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import products")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--key", choices=IMPORT_KEYS, default="sku")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class CartItem(BaseModel):
@@ -14,6 +14,14 @@ class CartItemAdd(BaseModel):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+class CartBatchOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    productId: str
+    quantity: int = Field(1, ge=1)  # ignored by remove
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartBatchOperation] = Field(..., min_length=1, max_length=100)
+
 class Cart(BaseModel):
     id: str = Field(alias="_id")
     userId: str
@@ -23,3 +31,20 @@ class Cart(BaseModel):
     class Config:
         populate_by_name = True
         json_encoders = {datetime: lambda v: v.isoformat()}
+
+class CartItemExpanded(CartItem):
+    """Cart line joined with the current product"""
+    name: Optional[str] = None
+    image: Optional[str] = None
+    currentPrice: Optional[float] = None
+    oldPrice: Optional[float] = None
+    discount: int = 0
+    stock: int = 0
+    inStock: bool = False
+    available: bool = True        # False when the product no longer exists
+    priceChanged: bool = False    # currentPrice differs from the price when added
+    outOfStock: bool = False      # unavailable, not in stock or stock below quantity
+
+class CartExpanded(Cart):
+    items: List[CartItemExpanded] = []
+    subtotal: float = 0.0         # current prices of the lines that can be ordered
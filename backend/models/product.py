@@ -1,9 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 from typing import Optional, List
 from datetime import datetime
 
 class ProductBase(BaseModel):
     name: str
+    sku: Optional[str] = None  # Supplier key used by bulk imports
+    slug: Optional[str] = None
     description: Optional[str] = None
     category: str
     brand: str
@@ -22,6 +24,8 @@ class ProductCreate(ProductBase):
 
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
+    sku: Optional[str] = None
+    slug: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
     brand: Optional[str] = None
@@ -37,6 +41,7 @@ class ProductUpdate(BaseModel):
 
 class Product(ProductBase):
     id: str = Field(alias="_id")
+    categoryPath: List[str] = []
     rating: float = 0.0
     reviews: int = 0
     createdAt: datetime = Field(default_factory=datetime.utcnow)
@@ -45,3 +50,81 @@ class Product(ProductBase):
     class Config:
         populate_by_name = True
         json_encoders = {datetime: lambda v: v.isoformat()}
+
+class ProductCard(BaseModel):
+    """Slim projection used by catalog cards"""
+    id: str = Field(alias="_id")
+    name: str
+    price: float
+    oldPrice: Optional[float] = None
+    image: Optional[str] = None
+    rating: float = 0.0
+    discount: int = 0
+
+    class Config:
+        populate_by_name = True
+
+class ProductBulkItem(ProductUpdate):
+    id: str
+
+class ProductBulkFilter(BaseModel):
+    category: Optional[str] = None  # Includes subcategories
+    brand: Optional[str] = None
+    minPrice: Optional[float] = None
+    maxPrice: Optional[float] = None
+    inStock: Optional[bool] = None
+
+class ProductBulkUpdate(BaseModel):
+    updates: List[ProductBulkItem] = []
+    filter: Optional[ProductBulkFilter] = None
+    set: Optional[ProductUpdate] = None
+    discountPercent: Optional[int] = Field(None, ge=0, le=95)  # 0 removes the discount
+
+class ProductBulkError(BaseModel):
+    index: int  # Position in `updates`, or -1 for the filter update
+    error: str
+
+class ProductBulkResult(BaseModel):
+    matched: int = 0
+    modified: int = 0
+    errors: List[ProductBulkError] = []
+
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    duplicates: int = 0  # Rows superseded by a later row with the same key in the same batch
+    errors: List[ProductImportError] = []
+    elapsedSeconds: float = 0.0
+    rowsPerSecond: float = 0.0
+
+class ProductBatchRequest(BaseModel):
+    ids: List[str]
+    view: Optional[str] = None
+    fields: Optional[List[str]] = None
+
+class ProductBatchResponse(BaseModel):
+    products: List[Product]
+    missing: List[str] = []
+
+# Fields a listing can be projected to with ?fields=
+PRODUCT_FIELDS = {
+    field.alias or name for name, field in Product.model_fields.items()
+}
+CARD_FIELDS = {field.alias or name for name, field in ProductCard.model_fields.items()}
+
+# Product with every field optional, for ?fields= listings: values get the same
+# coercion as Product and only the keys present in the document are dumped
+ProductProjection = create_model(
+    "ProductProjection",
+    __config__=ConfigDict(populate_by_name=True),
+    **{
+        name: (Optional[field.annotation], Field(None, alias=field.alias))
+        for name, field in Product.model_fields.items()
+    }
+)
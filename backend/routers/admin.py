@@ -355,3 +355,35 @@ async def get_all_reviews(
         "skip": skip,
         "limit": limit
     }
+
+@router.get("/indexes")
+async def get_index_report(
+    reconcile: bool = False,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Report index drift against the registry, optionally reconciling first"""
+    from utils.indexes import check_index_drift, ensure_indexes, has_drift
+    
+    report = await ensure_indexes(db) if reconcile else await check_index_drift(db)
+    
+    return {
+        "drift": has_drift(report),
+        "collections": report
+    }
+
+@router.get("/cache")
+async def get_cache_stats(current_admin: dict = Depends(get_current_admin_user)):
+    """Hit/miss/eviction counters of the catalog response cache"""
+    from utils.response_cache import listing_cache
+    
+    return {
+        "listings": listing_cache.stats()
+    }
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cache(current_admin: dict = Depends(get_current_admin_user)):
+    """Drop every cached catalog response"""
+    from utils.response_cache import listing_cache
+    
+    listing_cache.clear()
+    return None
@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from utils.dependencies import get_current_admin_user, db
+from utils.category_tree import category_tree
+from utils.catalog_events import catalog_reloaded
+from utils.category_paths import backfill_category_paths
 from datetime import datetime
 import json
 import io
@@ -187,6 +190,7 @@ async def restore_database(
                 
                 # Batch insert
                 total = await batch_insert(db.categories, categories, "Categories")
+                category_tree.invalidate()
                 restored_stats["categories"] = total
                 progress_details.append(f"Categories: ✓ Total {total} documente restaurate")
                     
@@ -212,6 +216,10 @@ async def restore_database(
                 total = await batch_insert(db.products, products, "Products")
                 restored_stats["products"] = total
                 progress_details.append(f"Products: ✓ Total {total} documente restaurate")
+                
+                # Restored products need their materialized category paths
+                updated = await backfill_category_paths(db)
+                progress_details.append(f"Products: {updated} căi de categorie actualizate")
                     
             except Exception as e:
                 errors.append(f"Products: {str(e)}")
@@ -283,6 +291,9 @@ async def restore_database(
                 restored_stats["orders"] = 0
                 progress_details.append("Orders: ✗ Eroare")
         
+        # Drop cached catalog data and rebuild the in-memory indexes
+        catalog_reloaded(db)
+        
         # Build response message
         message = "Backup restaurat cu succes!"
         if errors:
@@ -1,25 +1,36 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from models.cart import Cart, CartItemAdd, CartItemUpdate
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from models.cart import Cart, CartExpanded, CartItemAdd, CartItemUpdate, CartBatchRequest
 from utils.dependencies import db, get_current_user
-from bson import ObjectId
-from datetime import datetime
+from utils.popularity import popularity_counters
+from utils.cart import (
+    cart_products, add_line_stage, set_line_stage, set_quantity_stage, remove_line_stage,
+    update_cart, empty_cart, expanded_cart_pipeline, hydrate_cart
+)
+from typing import Optional
 
 router = APIRouter(prefix="/api/cart", tags=["Cart"])
 
 @router.get("", response_model=Cart)
-async def get_cart(current_user: dict = Depends(get_current_user)):
-    """Get user's cart"""
+async def get_cart(
+    expand: Optional[str] = Query(None, pattern="^products$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get user's cart. expand=products joins each line with the live product data."""
+    if expand:
+        carts = await db.carts.aggregate(expanded_cart_pipeline(str(current_user["_id"]))).to_list(length=1)
+        cart = hydrate_cart(carts[0]) if carts else {**empty_cart(str(current_user["_id"])), "subtotal": 0.0}
+        cart["_id"] = str(cart["_id"])
+        # Cart as response_model would drop the joined fields
+        return Response(
+            content=CartExpanded.model_validate(cart).model_dump_json(by_alias=True),
+            media_type="application/json"
+        )
+    
     cart = await db.carts.find_one({"userId": str(current_user["_id"])})
     
     if not cart:
-        # Create empty cart if doesn't exist
-        cart_dict = {
-            "userId": str(current_user["_id"]),
-            "items": [],
-            "updatedAt": datetime.utcnow()
-        }
-        result = await db.carts.insert_one(cart_dict)
-        cart = await db.carts.find_one({"_id": result.inserted_id})
+        # Nothing is stored until the first item is added
+        return empty_cart(str(current_user["_id"]))
     
     cart["_id"] = str(cart["_id"])
     return cart
@@ -30,69 +41,62 @@ async def add_to_cart(
     current_user: dict = Depends(get_current_user)
 ):
     """Add item to cart"""
-    # Verify product exists
-    if not ObjectId.is_valid(item.productId):
+    if item.quantity < 1:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid product ID"
+            detail="Quantity must be at least 1"
         )
     
-    product = await db.products.find_one({"_id": ObjectId(item.productId)})
+    # Verify product exists (cached price lookup)
+    product = (await cart_products(db, [item.productId])).get(item.productId)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    popularity_counters.record_cart_add(product["_id"], item.quantity)
     
-    # Get or create cart
-    cart = await db.carts.find_one({"userId": str(current_user["_id"])})
+    # Bump the existing line or append a new one, creating the cart if needed
+    cart = await update_cart(
+        db,
+        str(current_user["_id"]),
+        [add_line_stage(item.productId, item.quantity, product["price"])]
+    )
     
-    if not cart:
-        cart_dict = {
-            "userId": str(current_user["_id"]),
-            "items": [{
-                "productId": item.productId,
-                "quantity": item.quantity,
-                "price": product["price"]
-            }],
-            "updatedAt": datetime.utcnow()
-        }
-        result = await db.carts.insert_one(cart_dict)
-        cart = await db.carts.find_one({"_id": result.inserted_id})
-    else:
-        # Check if item already in cart
-        existing_item = None
-        for cart_item in cart.get("items", []):
-            if cart_item["productId"] == item.productId:
-                existing_item = cart_item
-                break
-        
-        if existing_item:
-            # Update quantity
-            await db.carts.update_one(
-                {"_id": cart["_id"], "items.productId": item.productId},
-                {
-                    "$inc": {"items.$.quantity": item.quantity},
-                    "$set": {"updatedAt": datetime.utcnow()}
-                }
-            )
+    cart["_id"] = str(cart["_id"])
+    return cart
+
+@router.post("/batch", response_model=Cart)
+async def batch_update_cart(
+    batch: CartBatchRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Apply add/set/remove operations in order as one atomic cart update"""
+    # Removals are allowed for products that no longer exist
+    product_ids = list(dict.fromkeys(
+        operation.productId for operation in batch.operations if operation.op != "remove"
+    ))
+    products = await cart_products(db, product_ids)
+    missing = [product_id for product_id in product_ids if product_id not in products]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Products not found: {', '.join(missing)}"
+        )
+    
+    stages = []
+    for operation in batch.operations:
+        if operation.op == "remove":
+            stages.append(remove_line_stage(operation.productId))
+            continue
+        product = products[operation.productId]
+        if operation.op == "add":
+            popularity_counters.record_cart_add(product["_id"], operation.quantity)
+            stages.append(add_line_stage(operation.productId, operation.quantity, product["price"]))
         else:
-            # Add new item
-            await db.carts.update_one(
-                {"_id": cart["_id"]},
-                {
-                    "$push": {
-                        "items": {
-                            "productId": item.productId,
-                            "quantity": item.quantity,
-                            "price": product["price"]
-                        }
-                    },
-                    "$set": {"updatedAt": datetime.utcnow()}
-                }
-            )
-        
-        cart = await db.carts.find_one({"_id": cart["_id"]})
+            stages.append(set_line_stage(operation.productId, operation.quantity, product["price"]))
+    
+    cart = await update_cart(db, str(current_user["_id"]), stages)
     
     cart["_id"] = str(cart["_id"])
     return cart
@@ -110,23 +114,20 @@ async def update_cart_item(
             detail="Quantity must be at least 1"
         )
     
-    result = await db.carts.update_one(
-        {"userId": str(current_user["_id"]), "items.productId": product_id},
-        {
-            "$set": {
-                "items.$.quantity": update_data.quantity,
-                "updatedAt": datetime.utcnow()
-            }
-        }
+    cart = await update_cart(
+        db,
+        str(current_user["_id"]),
+        [set_quantity_stage(product_id, update_data.quantity)],
+        upsert=False,
+        query={"items.productId": product_id}
     )
     
-    if result.matched_count == 0:
+    if cart is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found in cart"
         )
     
-    cart = await db.carts.find_one({"userId": str(current_user["_id"])})
     cart["_id"] = str(cart["_id"])
     return cart
 
@@ -136,37 +137,23 @@ async def remove_from_cart(
     current_user: dict = Depends(get_current_user)
 ):
     """Remove item from cart"""
-    await db.carts.update_one(
-        {"userId": str(current_user["_id"])},
-        {
-            "$pull": {"items": {"productId": product_id}},
-            "$set": {"updatedAt": datetime.utcnow()}
-        }
+    cart = await update_cart(
+        db,
+        str(current_user["_id"]),
+        [remove_line_stage(product_id)],
+        upsert=False
     )
     
-    cart = await db.carts.find_one({"userId": str(current_user["_id"])})
     if cart:
         cart["_id"] = str(cart["_id"])
         return cart
     
     # Return empty cart if not found
-    return {
-        "_id": "new",
-        "userId": str(current_user["_id"]),
-        "items": [],
-        "updatedAt": datetime.utcnow()
-    }
+    return empty_cart(str(current_user["_id"]))
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_cart(current_user: dict = Depends(get_current_user)):
     """Clear cart"""
-    await db.carts.update_one(
-        {"userId": str(current_user["_id"])},
-        {
-            "$set": {
-                "items": [],
-                "updatedAt": datetime.utcnow()
-            }
-        }
-    )
+    # An empty cart is the same as no cart
+    await db.carts.delete_one({"userId": str(current_user["_id"])})
     return None
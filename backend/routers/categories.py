@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from models.category import Category, CategoryCreate, CategoryUpdate
 from utils.dependencies import db, get_current_admin_user
+from utils.category_tree import category_tree
+from utils.category_menu import category_menu
+from utils.category_stats import category_stats
+from utils.category_paths import sync_category_paths, rename_category_slug
+from utils.catalog_events import category_changed
+from utils.http_cache import catalog_version, make_etag, validator_headers, is_not_modified, not_modified
 from bson import ObjectId
 from datetime import datetime
 from typing import List
@@ -8,8 +14,14 @@ from typing import List
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
 
 @router.get("", response_model=List[Category])
-async def get_categories():
-    """Get all categories with subcategories"""
+async def get_categories(request: Request, response: Response):
+    """Get all categories with subcategories. Supports conditional GET."""
+    etag = catalog_version.etag("categories")
+    last_modified = catalog_version.last_modified("categories")
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
     categories = await db.categories.find().to_list(length=200)
     
     for category in categories:
@@ -20,6 +32,39 @@ async def get_categories():
     
     return categories
 
+@router.get("/tree")
+async def get_category_tree(request: Request):
+    """Nested category tree with product counts (descendants included), served pre-encoded"""
+    await category_menu.ensure_built(db)
+    
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    etag = category_menu.gzip_etag if use_gzip else category_menu.etag
+    last_modified = category_menu.last_modified
+    headers = {"Vary": "Accept-Encoding"}
+    
+    if is_not_modified(request, etag, last_modified):
+        response = not_modified(etag, last_modified)
+        response.headers.update(headers)
+        return response
+    
+    headers.update(validator_headers(etag, last_modified))
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=category_menu.gzipped, media_type="application/json", headers=headers)
+    return Response(content=category_menu.body, media_type="application/json", headers=headers)
+
+@router.get("/stats")
+async def get_category_stats(request: Request, response: Response):
+    """Product count, in-stock count and price range per category slug (descendants included)"""
+    await category_stats.ensure_loaded(db)
+    etag = make_etag("category-stats", catalog_version.boot_id, category_stats.generation)
+    last_modified = category_stats.last_modified
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
+    return category_stats.snapshot()
+
 @router.post("", response_model=Category, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
@@ -38,6 +83,11 @@ async def create_category(
     category_dict["createdAt"] = datetime.utcnow()
     
     result = await db.categories.insert_one(category_dict)
+    category_tree.invalidate()
+    
+    # Products may already reference this slug
+    await sync_category_paths(db, [category_data.slug])
+    category_changed([category_data.slug])
     
     created_category = await db.categories.find_one({"_id": result.inserted_id})
     created_category["_id"] = str(created_category["_id"])
@@ -64,6 +114,16 @@ async def update_category(
             detail="No fields to update"
         )
     
+    existing_category = await db.categories.find_one({"_id": ObjectId(category_id)})
+    if not existing_category:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+    
+    await category_tree.ensure_loaded(db)
+    affected_slugs = set(category_tree.subtree_of(existing_category["slug"])) | {existing_category["slug"]}
+    
     # Check if slug already exists (if updating slug)
     if "slug" in update_data:
         existing = await db.categories.find_one({
@@ -87,6 +147,18 @@ async def update_category(
             detail="Category not found"
         )
     
+    category_tree.invalidate()
+    
+    # Keep the materialized categoryPath of affected products in sync
+    old_slug = existing_category["slug"]
+    new_slug = update_data.get("slug", old_slug)
+    if new_slug != old_slug:
+        await rename_category_slug(db, old_slug, new_slug)
+    if new_slug != old_slug or "parentId" in update_data:
+        await category_tree.ensure_loaded(db)
+        await sync_category_paths(db, category_tree.subtree_of(new_slug))
+    category_changed(affected_slugs | {new_slug})
+    
     updated_category = await db.categories.find_one({"_id": ObjectId(category_id)})
     updated_category["_id"] = str(updated_category["_id"])
     
@@ -104,6 +176,10 @@ async def delete_category(
             detail="Invalid category ID"
         )
     
+    category = await db.categories.find_one({"_id": ObjectId(category_id)}, {"slug": 1})
+    await category_tree.ensure_loaded(db)
+    subtree = category_tree.subtree_of(category["slug"]) if category else ()
+    
     result = await db.categories.delete_one({"_id": ObjectId(category_id)})
     
     if result.deleted_count == 0:
@@ -112,4 +188,11 @@ async def delete_category(
             detail="Category not found"
         )
     
+    category_tree.invalidate()
+    
+    # Subcategories lose their ancestor, so their products need new paths
+    if len(subtree) > 1:
+        await sync_category_paths(db, subtree[1:])
+    category_changed(subtree)
+    
     return None
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Request, Response
+from utils.dependencies import db
+from utils.homepage import homepage_snapshot
+from utils.http_cache import is_not_modified, not_modified, validator_headers
+
+router = APIRouter(prefix="/api/home", tags=["Home"])
+
+@router.get("")
+async def get_home(request: Request):
+    """Homepage rails (featured, new, discounted, top categories) as product cards"""
+    body = await homepage_snapshot.get(db)
+    etag, last_modified = homepage_snapshot.etag, homepage_snapshot.last_modified
+    
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=validator_headers(etag, last_modified)
+    )
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from models.order import Order, OrderCreate, OrderStatusUpdate
 from utils.dependencies import db, get_current_user, get_current_admin_user
+from utils.ids import ids_filter
+from utils.inventory import InsufficientStock, reserve_stock, release_stock, confirm_reservation
+from utils.catalog_events import product_changed
+from utils.recommendations import co_purchase_index
 from bson import ObjectId
 from datetime import datetime
 from typing import List
@@ -54,19 +58,74 @@ async def create_order(
     order_data: OrderCreate,
     current_user: dict = Depends(get_current_user)
 ):
-    """Create a new order"""
+    """Create a new order, reserving stock for every line"""
+    # Merge repeated lines for the same product
+    quantities = {}
+    for item in order_data.items:
+        if item.quantity < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Quantity must be at least 1"
+            )
+        quantities[item.productId] = quantities.get(item.productId, 0) + item.quantity
+    if not quantities:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order has no items"
+        )
+    
+    # Prices, names and stock come from the catalog, not the client
+    products = {}
+    async for product in db.products.find(
+        ids_filter(quantities),
+        {"name": 1, "price": 1, "image": 1, "stock": 1, "inStock": 1, "category": 1,
+         "categoryPath": 1, "brand": 1, "featured": 1, "isNew": 1, "discount": 1}
+    ):
+        products[str(product["_id"])] = product
+    
+    missing = [product_id for product_id in quantities if product_id not in products]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Products not found: {', '.join(missing)}"
+        )
+    
+    items = [
+        {
+            "productId": product_id,
+            "name": products[product_id]["name"],
+            "price": products[product_id]["price"],
+            "quantity": quantity,
+            "image": products[product_id].get("image") or ""
+        }
+        for product_id, quantity in quantities.items()
+    ]
+    
     # Calculate totals
-    subtotal = sum(item.price * item.quantity for item in order_data.items)
+    subtotal = sum(item["price"] * item["quantity"] for item in items)
     shipping = 0 if subtotal > 300 else 30
     total = subtotal + shipping
     
     # Generate order ID
     order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
     
+    # Reserve stock for all lines at once, keyed by the stored _id
+    lines = {products[product_id]["_id"]: quantity for product_id, quantity in quantities.items()}
+    try:
+        await reserve_stock(
+            db, lines, order_id,
+            available={product["_id"]: product.get("stock") for product in products.values()}
+        )
+    except InsufficientStock as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Insufficient stock", "items": e.shortages}
+        )
+    
     order_dict = {
         "orderId": order_id,
         "userId": str(current_user["_id"]),
-        "items": [item.dict() for item in order_data.items],
+        "items": items,
         "subtotal": subtotal,
         "shipping": shipping,
         "total": total,
@@ -78,13 +137,26 @@ async def create_order(
         "updatedAt": datetime.utcnow()
     }
     
-    result = await db.orders.insert_one(order_dict)
+    try:
+        result = await db.orders.insert_one(order_dict)
+    except Exception:
+        await release_stock(db, lines, order_id)
+        raise
+    await confirm_reservation(db, lines, order_id)
+    co_purchase_index.add_order(items)
+    
+    # Stock, inStock and updatedAt changed on every line: product validators,
+    # listings and category stats must all see it
+    async for reserved in db.products.find({"_id": {"$in": list(lines)}}):
+        seen = products[str(reserved["_id"])]
+        before = {**reserved, **seen}
+        if "inStock" not in seen:
+            # Seed products have no inStock until a reservation sets it
+            before.pop("inStock", None)
+        product_changed(before, reserved)
     
-    # Clear user's cart after order is created
-    await db.carts.update_one(
-        {"userId": str(current_user["_id"])},
-        {"$set": {"items": [], "updatedAt": datetime.utcnow()}}
-    )
+    # Remove user's cart after order is created
+    await db.carts.delete_one({"userId": str(current_user["_id"])})
     
     created_order = await db.orders.find_one({"_id": result.inserted_id})
     created_order["_id"] = str(created_order["_id"])
@@ -1,99 +1,372 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from models.product import Product, ProductCreate, ProductUpdate
-from utils.dependencies import db, get_current_admin_user
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response, UploadFile, File
+from fastapi.security import HTTPAuthorizationCredentials
+from models.product import (
+    Product, ProductCard, ProductCreate, ProductUpdate, ProductBatchRequest, ProductBatchResponse,
+    ProductImportReport, ProductBulkUpdate, ProductBulkResult, ProductProjection,
+    PRODUCT_FIELDS, CARD_FIELDS
+)
+from utils.dependencies import db, security, get_current_admin_user, get_optional_user
+from utils.wishlist import wishlist_members
+from utils.product_query import ProductFilters, build_product_query, in_stock_query
+from utils.category_paths import category_path
+from utils.cache import TTLCache
+from utils.ids import ids_filter
+from utils.pagination import InvalidCursor, encode_cursor, decode_cursor, keyset_filter
+from utils.catalog_events import product_changed, products_bulk_updated, catalog_reloaded, register_volatile_cache
+from utils.response_cache import listing_cache
+from utils.suggest import suggest_index
+from utils.popularity import popularity_counters
+from utils.recommendations import co_purchase_index, TOP_K
+from utils.similarity import similarity_index
+from utils.product_bulk import MAX_BULK_UPDATES, bulk_filter_query, bulk_targets_query, build_bulk_operations
+from utils.product_import import ProductImporter, IMPORT_FORMATS, detect_format, iter_rows
+from utils.http_cache import (
+    catalog_version, make_etag, to_http_datetime, validator_headers, is_not_modified, not_modified
+)
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime
 from typing import Optional, List
+from pydantic import TypeAdapter
+import json
+import re
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
+ProductList = TypeAdapter(List[Product])
+ProductCardList = TypeAdapter(List[ProductCard])
+ProjectedList = TypeAdapter(List[ProductProjection])
+
+def select_fields(view: Optional[str], fields: Optional[str]) -> Optional[set]:
+    """Fields a listing should return, or None for full documents"""
+    if fields:
+        requested = {"_id" if name == "id" else name for name in (f.strip() for f in fields.split(",")) if name}
+        unknown = requested - PRODUCT_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested | {"_id"}
+    if view == "card":
+        return set(CARD_FIELDS)
+    return None
+
+def encode_products(products: list, selected: Optional[set] = None, wishlist: Optional[frozenset] = None) -> bytes:
+    """Serialize products exactly as the matching response model would.
+    
+    With `wishlist` (a user's wishlisted ids) every object also gets inWishlist.
+    """
+    if wishlist is not None:
+        flags = [b',"inWishlist":true}' if product["_id"] in wishlist else b',"inWishlist":false}' for product in products]
+        # Encode one product at a time and splice the flag before the closing brace
+        items = [encode_products([product], selected)[1:-2] + flag for product, flag in zip(products, flags)]
+        return b"[" + b",".join(items) + b"]"
+    if selected == CARD_FIELDS:
+        return ProductCardList.dump_json(ProductCardList.validate_python(products), by_alias=True)
+    if selected is not None:
+        rows = [{key: product[key] for key in product if key in selected} for product in products]
+        return ProjectedList.dump_json(ProjectedList.validate_python(rows), by_alias=True, exclude_unset=True)
+    return ProductList.dump_json(ProductList.validate_python(products), by_alias=True)
+
+# Largest number of ids a single batch lookup may resolve
+MAX_BATCH_IDS = 500
+
+# Facet results are cheap to recompute but requested on every catalog page
+facets_cache = register_volatile_cache(TTLCache(maxsize=512, ttl=30))
+
 @router.get("", response_model=List[Product])
 async def get_products(
-    category: Optional[str] = None,
-    brand: Optional[str] = None,
-    search: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    in_stock: Optional[bool] = None,
-    is_new: Optional[bool] = None,
-    discount: Optional[bool] = None,
-    featured: Optional[bool] = None,
-    sort_by: Optional[str] = Query(None, regex="^(price_asc|price_desc|rating|name)$"),
+    request: Request,
+    filters: ProductFilters = Depends(),
+    sort_by: Optional[str] = Query(None, regex="^(price_asc|price_desc|rating|name|popular|relevance)$"),
+    cursor: Optional[str] = None,
+    view: Optional[str] = Query(None, regex="^(full|card)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated product fields to return"),
+    annotate: Optional[str] = Query(None, regex="^wishlist$"),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ):
-    """Get all products with filters. If no filters, returns featured products."""
-    query = {}
-    
-    # Check if any filters are applied
-    has_filters = any([category, brand, search, min_price, max_price, in_stock, is_new, discount, featured])
-    
-    # If no filters are applied, return featured products
-    if not has_filters:
-        query["featured"] = True
-    
-    # Apply filters
-    if category:
-        # Check if category is a parent category slug
-        category_doc = await db.categories.find_one({"slug": category})
-        if category_doc:
-            # Get all subcategories for this parent
-            subcategories = await db.categories.find({"parentId": str(category_doc["_id"])}).to_list(length=None)
-            subcategory_slugs = [sub["slug"] for sub in subcategories]
-            
-            # If it has subcategories, search in both parent and subcategories
-            if subcategory_slugs:
-                query["category"] = {"$in": [category] + subcategory_slugs}
-            else:
-                # It's a subcategory or leaf category, just filter by it
-                query["category"] = category
-        else:
-            query["category"] = category
-    
-    if brand:
-        query["brand"] = brand
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"brand": {"$regex": search, "$options": "i"}}
-        ]
-    if min_price is not None or max_price is not None:
-        query["price"] = {}
-        if min_price is not None:
-            query["price"]["$gte"] = min_price
-        if max_price is not None:
-            query["price"]["$lte"] = max_price
-    if in_stock is not None:
-        query["inStock"] = in_stock
-    if is_new is not None:
-        query["isNew"] = is_new
-    if discount:
-        query["discount"] = {"$gt": 0}
-    if featured is not None:
-        query["featured"] = featured
-    
-    # Apply sorting
+    """Get all products with filters. If no filters, returns featured products.
+    
+    Pass the X-Next-Cursor header of a response back as `cursor` to fetch the
+    next page; `skip` is ignored when a cursor is given. `view=card` returns
+    ProductCard items and `fields=` an arbitrary subset of Product fields.
+    `annotate=wishlist` adds inWishlist to each product for signed-in users.
+    """
+    selected = select_fields(view, fields)
+    
+    wishlist = None
+    if annotate == "wishlist":
+        current_user = await get_optional_user(credentials)
+        if current_user is not None:
+            wishlist = await wishlist_members.get(db, str(current_user["_id"]))
+    
+    listing_key = json.dumps({
+        "filters": filters.normalized(),
+        "fields": sorted(selected) if selected else None,
+        "sort_by": sort_by,
+        "cursor": cursor,
+        "skip": skip,
+        "limit": limit
+    }, sort_keys=True)
+    
+    # Conditional GET: the listing can only change when the catalog version does
+    # (or, for the popular ordering, when popularity counters are flushed)
+    scopes = ("products", "categories", "popularity") if sort_by == "popular" else ("products", "categories")
+    etag_key = listing_key
+    if wishlist is not None:
+        # Wishlist flags are per user and change without a catalog write
+        etag_key += "|" + str(current_user["_id"]) + "|" + ",".join(sorted(wishlist))
+    etag = catalog_version.etag(*scopes, key=etag_key)
+    last_modified = None if wishlist is not None else catalog_version.last_modified(*scopes)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    # Anonymous listings are served from the response cache when possible
+    cache_key = None
+    if "authorization" not in request.headers:
+        cache_key = listing_key
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return Response(
+                content=cached.body,
+                media_type="application/json",
+                headers={**cached.headers, **validator_headers(etag, last_modified)}
+            )
+    
+    query, search_ids = build_product_query(filters)
+    
+    # Apply sorting - _id breaks ties so every ordering is total
     sort_options = {
-        "price_asc": [("price", 1)],
-        "price_desc": [("price", -1)],
-        "rating": [("rating", -1)],
-        "name": [("name", 1)]
+        "price_asc": [("price", 1), ("_id", 1)],
+        "price_desc": [("price", -1), ("_id", -1)],
+        "rating": [("rating", -1), ("_id", -1)],
+        "name": [("name", 1), ("_id", 1)],
+        "popular": [("popularity", -1), ("_id", -1)]
     }
-    sort = sort_options.get(sort_by, [("createdAt", -1)])
+    sort_name = sort_by if sort_by in sort_options else "createdAt"
+    sort = sort_options.get(sort_by, [("createdAt", -1), ("_id", -1)])
+    headers = {}
+    
+    # Push sparse fieldsets down to MongoDB. Sort keys feed the next cursor and
+    # categoryPath feeds cache invalidation, so both are always fetched.
+    projection = None
+    if selected is not None:
+        projection = {field: 1 for field in selected | {"categoryPath"}}
+        projection.update({field: 1 for field, _ in sort})
     
-    # Query database
-    cursor = db.products.find(query).sort(sort).skip(skip).limit(limit)
-    products = await cursor.to_list(length=limit)
+    if search_ids is not None and sort_by in (None, "relevance"):
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance ordering"
+            )
+        # Relevance order: narrow the ranked hits by the other filters, then cut the page
+        ranked = search_ids
+        if len(query) > 1:
+            matching = {product["_id"] async for product in db.products.find(query, {"_id": 1})}
+            ranked = [product_id for product_id in search_ids if product_id in matching]
+        page = ranked[skip:skip + limit]
+        position = {product_id: index for index, product_id in enumerate(page)}
+        products = await db.products.find({"_id": {"$in": page}}, projection).to_list(length=None)
+        products.sort(key=lambda p: position[p["_id"]])
+    else:
+        if cursor:
+            try:
+                after = keyset_filter(sort, decode_cursor(cursor, sort_name, sort))
+            except InvalidCursor as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+            query = {"$and": [query, after]} if query else after
+            skip = 0
+        
+        # Query database
+        db_cursor = db.products.find(query, projection).sort(sort).skip(skip).limit(limit)
+        products = await db_cursor.to_list(length=limit)
+        
+        if limit and len(products) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(sort_name, sort, products[-1])
     
     # Convert ObjectId to string
     for product in products:
         product["_id"] = str(product["_id"])
     
-    return products
+    body = encode_products(products, selected, wishlist)
+    if cache_key is not None:
+        cache_filters = filters.normalized()
+        if not filters.has_filters():
+            cache_filters["featured"] = True
+        listing_cache.set(cache_key, body, cache_filters, products, headers, sort_by=sort_by)
+    
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**headers, **validator_headers(etag, last_modified)}
+    )
+
+@router.get("/facets")
+async def get_product_facets(
+    filters: ProductFilters = Depends(),
+    price_buckets: Optional[str] = Query(None, description="Comma-separated price boundaries, e.g. 0,500,1000,5000"),
+    bucket_count: int = Query(5, ge=1, le=50)
+):
+    """Brand, category, stock, discount and price facets for the given filters"""
+    boundaries = None
+    if price_buckets:
+        try:
+            boundaries = sorted({float(value) for value in price_buckets.split(",") if value.strip()})
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid price buckets"
+            )
+        if len(boundaries) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least two price boundaries are required"
+            )
+    
+    cache_key = json.dumps(
+        {"filters": filters.normalized(), "boundaries": boundaries, "buckets": bucket_count},
+        sort_keys=True
+    )
+    cached = facets_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query, _ = build_product_query(filters, default_featured=False)
+    
+    if boundaries:
+        histogram = [{"$bucket": {
+            "groupBy": "$price",
+            "boundaries": boundaries,
+            "default": "other",
+            "output": {"count": {"$sum": 1}}
+        }}]
+    else:
+        histogram = [{"$bucketAuto": {
+            "groupBy": "$price",
+            "buckets": bucket_count,
+            "output": {"count": {"$sum": 1}}
+        }}]
+    
+    # All facets in a single round trip over the filtered set
+    pipeline = [
+        {"$match": query},
+        {"$project": {"brand": 1, "category": 1, "inStock": 1, "discount": 1, "price": 1}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "brands": [
+                {"$group": {"_id": "$brand", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ],
+            "categories": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ],
+            "inStock": [{"$match": in_stock_query(True)}, {"$count": "count"}],
+            "discounted": [{"$match": {"discount": {"$gt": 0}}}, {"$count": "count"}],
+            "priceHistogram": histogram
+        }}
+    ]
+    result = (await db.products.aggregate(pipeline).to_list(length=1))[0]
+    
+    def count_of(stage):
+        return stage[0]["count"] if stage else 0
+    
+    price_histogram = []
+    for bucket in result["priceHistogram"]:
+        if boundaries:
+            if bucket["_id"] == "other":
+                continue
+            lower = bucket["_id"]
+            upper = boundaries[boundaries.index(lower) + 1]
+        else:
+            lower, upper = bucket["_id"]["min"], bucket["_id"]["max"]
+        price_histogram.append({"min": lower, "max": upper, "count": bucket["count"]})
+    
+    facets = {
+        "total": count_of(result["total"]),
+        "brands": [{"value": b["_id"], "count": b["count"]} for b in result["brands"]],
+        "categories": [{"value": c["_id"], "count": c["count"]} for c in result["categories"]],
+        "inStock": count_of(result["inStock"]),
+        "discounted": count_of(result["discounted"]),
+        "priceHistogram": price_histogram
+    }
+    facets_cache.set(cache_key, facets)
+    
+    return facets
+
+async def _batch_lookup(ids: List[str], view: Optional[str], fields: Optional[str]) -> Response:
+    """Resolve ids with one $in query, keeping the requested order"""
+    ids = list(dict.fromkeys(i.strip() for i in ids if i and i.strip()))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids per request"
+        )
+    if view is not None and view not in ("full", "card"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid view"
+        )
+    
+    selected = select_fields(view, fields)
+    projection = {field: 1 for field in selected} if selected is not None else None
+    
+    found = {}
+    if ids:
+        async for product in db.products.find(ids_filter(ids), projection):
+            product["_id"] = str(product["_id"])
+            found[product["_id"]] = product
+    
+    products = [found[i] for i in ids if i in found]
+    missing = [i for i in ids if i not in found]
+    
+    body = b'{"products":' + encode_products(products, selected) + b',"missing":' + json.dumps(missing).encode("utf-8") + b"}"
+    return Response(content=body, media_type="application/json")
+
+@router.get("/suggest")
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20)
+):
+    """Typeahead suggestions: product names, brands and categories matching a prefix"""
+    if not suggest_index.ready:
+        # Index still loading - answer product names from the database
+        products = await db.products.find(
+            {"name": {"$regex": "^" + re.escape(q.strip()), "$options": "i"}},
+            {"name": 1, "price": 1, "image": 1}
+        ).sort("rating", -1).limit(limit).to_list(length=limit)
+        for product in products:
+            product["_id"] = str(product["_id"])
+        return {"query": q, "products": products, "brands": [], "categories": []}
+    
+    return await suggest_index.suggest(db, q, limit)
+
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids (ObjectId or UUID)"),
+    view: Optional[str] = Query(None, regex="^(full|card)$"),
+    fields: Optional[str] = None
+):
+    """Get many products by id in one round trip, in the requested order"""
+    return await _batch_lookup(ids.split(","), view, fields)
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def post_products_batch(request_data: ProductBatchRequest):
+    """Batch lookup for id lists too long for a query string"""
+    fields = ",".join(request_data.fields) if request_data.fields else None
+    return await _batch_lookup(request_data.ids, request_data.view, fields)
 
 @router.get("/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    """Get product by ID"""
+async def get_product(product_id: str, request: Request, response: Response):
+    """Get product by ID. Supports If-None-Match / If-Modified-Since."""
     if not ObjectId.is_valid(product_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -107,9 +380,45 @@ async def get_product(product_id: str):
             detail="Product not found"
         )
     
+    # Validators come from the document itself
+    etag = make_etag(product["_id"], product.get("updatedAt"))
+    last_modified = to_http_datetime(product.get("updatedAt"))
+    popularity_counters.record_view(product["_id"])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
     product["_id"] = str(product["_id"])
     return product
 
+async def _cards_in_order(ids: List[str]) -> Response:
+    """Encode the given products as cards, in the order of `ids`, skipping deleted ones"""
+    found = {}
+    if ids:
+        async for product in db.products.find(ids_filter(ids), {field: 1 for field in CARD_FIELDS}):
+            product["_id"] = str(product["_id"])
+            found[product["_id"]] = product
+    products = [found[i] for i in ids if i in found]
+    return Response(content=encode_products(products, CARD_FIELDS), media_type="application/json")
+
+@router.get("/{product_id}/related", response_model=List[ProductCard])
+async def get_related_products(
+    product_id: str,
+    limit: int = Query(8, ge=1, le=TOP_K)
+):
+    """Products most often bought together with this one"""
+    related = co_purchase_index.related(product_id, limit)
+    return await _cards_in_order([related_id for related_id, _ in related])
+
+@router.get("/{product_id}/similar", response_model=List[ProductCard])
+async def get_similar_products(
+    product_id: str,
+    limit: int = Query(8, ge=1, le=TOP_K)
+):
+    """Products with the closest category, brand, price, specifications and name"""
+    similar = similarity_index.similar(product_id, limit)
+    return await _cards_in_order([similar_id for similar_id, _ in similar])
+
 @router.post("", response_model=Product, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
@@ -119,16 +428,99 @@ async def create_product(
     product_dict = product_data.dict()
     product_dict["rating"] = 0.0
     product_dict["reviews"] = 0
+    product_dict["categoryPath"] = await category_path(db, product_dict["category"])
     product_dict["createdAt"] = datetime.utcnow()
     product_dict["updatedAt"] = datetime.utcnow()
     
-    result = await db.products.insert_one(product_dict)
+    try:
+        result = await db.products.insert_one(product_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A product with this SKU or slug already exists"
+        )
     
     created_product = await db.products.find_one({"_id": result.inserted_id})
+    product_changed(None, created_product)
     created_product["_id"] = str(created_product["_id"])
     
     return created_product
 
+@router.post("/import", response_model=ProductImportReport)
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    key: str = Query("sku", regex="^(sku|slug)$"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Upsert products from a CSV or NDJSON file, keyed on sku or slug (Admin only)"""
+    file_format = format or detect_format(file.filename)
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown file format. Use a .csv or .ndjson file or pass format="
+        )
+    
+    importer = ProductImporter(db, key=key, batch_size=batch_size)
+    report = await importer.run(iter_rows(file.file, file_format))
+    
+    if report["inserted"] or report["updated"]:
+        catalog_reloaded(db)
+    
+    return report
+
+@router.patch("/bulk", response_model=ProductBulkResult)
+async def bulk_update_products(
+    request_data: ProductBulkUpdate,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Apply many product updates in one bulk write (Admin only)"""
+    if len(request_data.updates) > MAX_BULK_UPDATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_UPDATES} updates per request"
+        )
+    if request_data.filter is not None:
+        if not bulk_filter_query(request_data.filter):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Filter must have at least one criterion"
+            )
+        if request_data.set is None and request_data.discountPercent is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Filter updates need a set template or discountPercent"
+            )
+    
+    operations, indexes, fields = await build_bulk_operations(db, request_data)
+    if not operations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    
+    # Products the write can reach, looked up first: a filter may stop matching afterwards
+    targets = [product["_id"] async for product in db.products.find(bulk_targets_query(request_data), {"_id": 1})]
+    
+    errors = []
+    try:
+        result = await db.products.bulk_write(operations, ordered=False)
+        matched, modified = result.matched_count, result.modified_count
+    except BulkWriteError as e:
+        matched, modified = e.details.get("nMatched", 0), e.details.get("nModified", 0)
+        errors = [
+            {"index": indexes[error["index"]], "error": error.get("errmsg", "Write failed")}
+            for error in e.details.get("writeErrors", [])
+        ]
+    
+    # One invalidation for the whole batch, re-indexing only the written products
+    if modified:
+        products = await db.products.find({"_id": {"$in": targets}}).to_list(length=None)
+        products_bulk_updated(db, products, fields)
+    
+    return {"matched": matched, "modified": modified, "errors": errors}
+
 @router.put("/{product_id}", response_model=Product)
 async def update_product(
     product_id: str,
@@ -149,20 +541,30 @@ async def update_product(
             detail="No fields to update"
         )
     
+    if "category" in update_data:
+        update_data["categoryPath"] = await category_path(db, update_data["category"])
     update_data["updatedAt"] = datetime.utcnow()
     
-    result = await db.products.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": update_data}
-    )
+    try:
+        previous_product = await db.products.find_one_and_update(
+            {"_id": ObjectId(product_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A product with this SKU or slug already exists"
+        )
     
-    if result.matched_count == 0:
+    if previous_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    updated_product = await db.products.find_one({"_id": ObjectId(product_id)})
+    updated_product = {**previous_product, **update_data}
+    product_changed(previous_product, updated_product)
     updated_product["_id"] = str(updated_product["_id"])
     
     return updated_product
@@ -179,12 +581,14 @@ async def delete_product(
             detail="Invalid product ID"
         )
     
-    result = await db.products.delete_one({"_id": ObjectId(product_id)})
+    deleted_product = await db.products.find_one_and_delete({"_id": ObjectId(product_id)})
     
-    if result.deleted_count == 0:
+    if deleted_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
+    product_changed(deleted_product, None)
+    
     return None
@@ -1,12 +1,29 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from models.review import Review, ReviewCreate, ReviewUpdate
 from utils.dependencies import db, get_current_user
+from utils.catalog_events import product_changed
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from typing import List
 
 router = APIRouter(prefix="/api/products", tags=["Reviews"])
 
+async def _refresh_product_rating(product_id: str):
+    """Recompute the product's rating and review count and announce the product write"""
+    all_reviews = await db.reviews.find({"productId": product_id}, {"rating": 1}).to_list(length=1000)
+    rating = round(sum(r["rating"] for r in all_reviews) / len(all_reviews), 1) if all_reviews else 0
+    update_data = {"rating": rating, "reviews": len(all_reviews), "updatedAt": datetime.utcnow()}
+    
+    previous_product = await db.products.find_one_and_update(
+        {"_id": ObjectId(product_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous_product is not None:
+        # Listings, product validators and rating sorts all depend on these fields
+        product_changed(previous_product, {**previous_product, **update_data})
+
 @router.get("/{product_id}/reviews", response_model=List[Review])
 async def get_product_reviews(product_id: str):
     """Get all reviews for a product"""
@@ -66,18 +83,7 @@ async def create_review(
     result = await db.reviews.insert_one(review_dict)
     
     # Update product rating and review count
-    all_reviews = await db.reviews.find({"productId": product_id}).to_list(length=1000)
-    avg_rating = sum(r["rating"] for r in all_reviews) / len(all_reviews)
-    
-    await db.products.update_one(
-        {"_id": ObjectId(product_id)},
-        {
-            "$set": {
-                "rating": round(avg_rating, 1),
-                "reviews": len(all_reviews)
-            }
-        }
-    )
+    await _refresh_product_rating(product_id)
     
     created_review = await db.reviews.find_one({"_id": result.inserted_id})
     created_review["_id"] = str(created_review["_id"])
@@ -125,13 +131,7 @@ async def update_review(
     
     # Update product rating if rating changed
     if "rating" in update_data:
-        all_reviews = await db.reviews.find({"productId": review["productId"]}).to_list(length=1000)
-        avg_rating = sum(r["rating"] for r in all_reviews) / len(all_reviews)
-        
-        await db.products.update_one(
-            {"_id": ObjectId(review["productId"])},
-            {"$set": {"rating": round(avg_rating, 1)}}
-        )
+        await _refresh_product_rating(review["productId"])
     
     updated_review = await db.reviews.find_one({"_id": ObjectId(review_id)})
     updated_review["_id"] = str(updated_review["_id"])
@@ -167,22 +167,6 @@ async def delete_review(
     await db.reviews.delete_one({"_id": ObjectId(review_id)})
     
     # Update product rating and review count
-    all_reviews = await db.reviews.find({"productId": review["productId"]}).to_list(length=1000)
-    if all_reviews:
-        avg_rating = sum(r["rating"] for r in all_reviews) / len(all_reviews)
-        await db.products.update_one(
-            {"_id": ObjectId(review["productId"])},
-            {
-                "$set": {
-                    "rating": round(avg_rating, 1),
-                    "reviews": len(all_reviews)
-                }
-            }
-        )
-    else:
-        await db.products.update_one(
-            {"_id": ObjectId(review["productId"])},
-            {"$set": {"rating": 0, "reviews": 0}}
-        )
+    await _refresh_product_rating(review["productId"])
     
     return None
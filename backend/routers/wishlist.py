@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from models.wishlist import Wishlist, WishlistAdd
 from utils.dependencies import db, get_current_user
-from bson import ObjectId
-from datetime import datetime
+from utils.wishlist import update_wishlist, wishlist_members, product_exists, empty_wishlist
 
 router = APIRouter(prefix="/api/wishlist", tags=["Wishlist"])
 
@@ -10,16 +9,11 @@ router = APIRouter(prefix="/api/wishlist", tags=["Wishlist"])
 async def get_wishlist(current_user: dict = Depends(get_current_user)):
     """Get user's wishlist"""
     wishlist = await db.wishlists.find_one({"userId": str(current_user["_id"])})
+    wishlist_members.set(str(current_user["_id"]), wishlist.get("products", []) if wishlist else [])
     
     if not wishlist:
-        # Create empty wishlist if doesn't exist
-        wishlist_dict = {
-            "userId": str(current_user["_id"]),
-            "products": [],
-            "updatedAt": datetime.utcnow()
-        }
-        result = await db.wishlists.insert_one(wishlist_dict)
-        wishlist = await db.wishlists.find_one({"_id": result.inserted_id})
+        # Nothing is stored until the first product is added
+        return empty_wishlist(str(current_user["_id"]))
     
     wishlist["_id"] = str(wishlist["_id"])
     return wishlist
@@ -31,41 +25,18 @@ async def add_to_wishlist(
 ):
     """Add product to wishlist"""
     # Verify product exists
-    if not ObjectId.is_valid(item.productId):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid product ID"
-        )
-    
-    product = await db.products.find_one({"_id": ObjectId(item.productId)})
-    if not product:
+    if not await product_exists(db, item.productId):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Get or create wishlist
-    wishlist = await db.wishlists.find_one({"userId": str(current_user["_id"])})
-    
-    if not wishlist:
-        wishlist_dict = {
-            "userId": str(current_user["_id"]),
-            "products": [item.productId],
-            "updatedAt": datetime.utcnow()
-        }
-        result = await db.wishlists.insert_one(wishlist_dict)
-        wishlist = await db.wishlists.find_one({"_id": result.inserted_id})
-    else:
-        # Check if product already in wishlist
-        if item.productId not in wishlist.get("products", []):
-            await db.wishlists.update_one(
-                {"_id": wishlist["_id"]},
-                {
-                    "$push": {"products": item.productId},
-                    "$set": {"updatedAt": datetime.utcnow()}
-                }
-            )
-            wishlist = await db.wishlists.find_one({"_id": wishlist["_id"]})
+    # $addToSet keeps the list free of duplicates without reading it first
+    wishlist = await update_wishlist(
+        db,
+        str(current_user["_id"]),
+        {"$addToSet": {"products": item.productId}}
+    )
     
     wishlist["_id"] = str(wishlist["_id"])
     return wishlist
@@ -76,23 +47,16 @@ async def remove_from_wishlist(
     current_user: dict = Depends(get_current_user)
 ):
     """Remove product from wishlist"""
-    await db.wishlists.update_one(
-        {"userId": str(current_user["_id"])},
-        {
-            "$pull": {"products": product_id},
-            "$set": {"updatedAt": datetime.utcnow()}
-        }
+    wishlist = await update_wishlist(
+        db,
+        str(current_user["_id"]),
+        {"$pull": {"products": product_id}},
+        upsert=False
     )
     
-    wishlist = await db.wishlists.find_one({"userId": str(current_user["_id"])})
     if wishlist:
         wishlist["_id"] = str(wishlist["_id"])
         return wishlist
     
     # Return empty wishlist if not found
-    return {
-        "_id": "new",
-        "userId": str(current_user["_id"]),
-        "products": [],
-        "updatedAt": datetime.utcnow()
-    }
+    return empty_wishlist(str(current_user["_id"]))
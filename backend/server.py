@@ -1,8 +1,8 @@
 from fastapi import FastAPI, APIRouter
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 
@@ -11,12 +11,10 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # Import routers AFTER loading environment variables
-from routers import auth, products, categories, cart, wishlist, orders, reviews, admin, backup
+from routers import auth, products, categories, cart, wishlist, orders, reviews, admin, backup, home
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, shared with the routers and background tasks
+from utils.dependencies import client, db
 
 # Create the main app without a prefix
 app = FastAPI(title="R32 E-Commerce API", version="1.0.0")
@@ -39,6 +37,7 @@ app.include_router(orders.router)
 app.include_router(reviews.router)
 app.include_router(admin.router)
 app.include_router(backup.router)
+app.include_router(home.router)
 app.include_router(api_router)
 
 app.add_middleware(
@@ -47,6 +46,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 # Configure logging
@@ -93,6 +93,127 @@ async def create_admin_user():
     except Exception as e:
         logger.error(f"❌ Failed to create admin user: {str(e)}")
 
+def _start_background(name: str, coro_factory):
+    """Run `coro_factory()` as a background task, logging a failure instead of raising"""
+    async def run():
+        try:
+            await coro_factory()
+        except Exception as e:
+            logger.error(f"❌ {name} failed: {str(e)}")
+
+    return asyncio.create_task(run())
+
+# Build/verify MongoDB indexes without blocking startup
+@app.on_event("startup")
+async def reconcile_indexes():
+    """Reconcile indexes with the registry in the background"""
+    from utils.indexes import ensure_indexes
+
+    async def reconcile():
+        await ensure_indexes(db)
+        logger.info("✅ Index reconciliation finished")
+
+    app.state.index_task = _start_background("Index reconciliation", reconcile)
+
+# Load the in-memory product search index
+@app.on_event("startup")
+async def build_search_index():
+    """Build the product search index in the background"""
+    from utils.search import search_index
+
+    app.state.search_task = _start_background("Search index build", lambda: search_index.rebuild(db))
+
+# Load the in-memory autocomplete index
+@app.on_event("startup")
+async def build_suggest_index():
+    """Build the typeahead prefix index in the background"""
+    from utils.suggest import suggest_index
+
+    app.state.suggest_task = _start_background("Suggest index build", lambda: suggest_index.rebuild(db))
+
+# Build "customers also bought" recommendations from order history
+@app.on_event("startup")
+async def build_recommendations():
+    """Build the co-purchase index in the background"""
+    from utils.recommendations import co_purchase_index
+
+    app.state.recommendations_task = _start_background(
+        "Co-purchase index build", lambda: co_purchase_index.rebuild(db)
+    )
+
+# Build the content-based "similar products" index
+@app.on_event("startup")
+async def build_similarity_index():
+    """Build the product similarity index in the background"""
+    from utils.similarity import similarity_index
+
+    app.state.similarity_task = _start_background(
+        "Similarity index build", lambda: similarity_index.rebuild(db)
+    )
+
+# Build the homepage snapshot before the first visitor asks for it
+@app.on_event("startup")
+async def build_homepage_snapshot():
+    """Build the homepage snapshot in the background"""
+    from utils.homepage import homepage_snapshot
+
+    app.state.homepage_task = _start_background("Homepage snapshot build", lambda: homepage_snapshot.build(db))
+
+# Warm the category tree used for category filters
+@app.on_event("startup")
+async def load_category_tree():
+    """Load the category hierarchy into memory"""
+    from utils.category_tree import category_tree
+    
+    try:
+        await category_tree.ensure_loaded(db)
+    except Exception as e:
+        logger.error(f"❌ Category tree load failed: {str(e)}")
+
+# Populate categoryPath on products that predate it
+@app.on_event("startup")
+async def backfill_category_paths_on_startup():
+    """Backfill materialized category paths in the background"""
+    from utils.category_paths import backfill_category_paths
+    from utils.catalog_events import catalog_reloaded
+
+    async def backfill():
+        # In-memory indexes may have been built from the old paths
+        if await backfill_category_paths(db):
+            catalog_reloaded(db)
+
+    app.state.category_path_task = _start_background("Category path backfill", backfill)
+
+# Flush buffered view / add-to-cart counters periodically
+@app.on_event("startup")
+async def start_popularity_counters():
+    """Start the write-behind flush loop for popularity counters"""
+    from utils.popularity import popularity_counters
+
+    popularity_counters.start(db)
+
+# Load per-category stats and reconcile them periodically
+@app.on_event("startup")
+async def start_category_stats():
+    """Start the category stats reconciliation loop"""
+    from utils.category_stats import category_stats
+
+    category_stats.start(db)
+
+# Remove empty and abandoned carts periodically
+@app.on_event("startup")
+async def start_cart_sweeper():
+    """Start the background cart sweep"""
+    from utils.cart import run_cart_sweeper
+
+    app.state.cart_sweeper_task = asyncio.create_task(run_cart_sweeper(db))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    from utils.popularity import popularity_counters
+    from utils.category_stats import category_stats
+
+    category_stats.stop()
+    # Write the last buffered counters before the connection closes
+    await popularity_counters.stop(db)
     client.close()
\ No newline at end of file
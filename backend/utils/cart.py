@@ -0,0 +1,233 @@
+"""
+Cart writes as single atomic updates.
+
+Every mutation is one find_one_and_update on the user's cart with
+upsert=True and return_document=AFTER, so concurrent requests from the
+same user never overwrite each other and the response needs no re-read.
+Adding a line is an update pipeline that either bumps the quantity of the
+existing line or appends a new one, decided server-side.
+
+Product prices come from a short-lived cache that catalog writes clear.
+
+`GET /api/cart?expand=products` joins every line with its product in one
+$lookup aggregation (ids stored as strings are matched against both
+string and ObjectId keys). The join uses plain localField/foreignField and
+trims the products with $map afterwards, so it runs on MongoDB 4.0+.
+
+Reads never create a cart: users without one get a virtual empty cart and
+the document appears on the first mutation. Clearing the cart or placing
+an order deletes it, and a periodic sweep removes carts left empty or
+untouched for too long.
+"""
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+from utils.cache import TTLCache
+from utils.catalog_events import register_volatile_cache
+from utils.ids import ids_filter
+
+logger = logging.getLogger(__name__)
+
+# Carts emptied by removing their last line are kept this long before the sweep
+EMPTY_CART_GRACE = timedelta(hours=1)
+
+# Carts not modified for this long are considered abandoned
+STALE_CART_AGE = timedelta(days=90)
+
+SWEEP_INTERVAL_SECONDS = 3600
+
+# product id string -> {"_id": stored _id, "price": float}
+_products_cache = register_volatile_cache(TTLCache(maxsize=4096, ttl=60))
+
+
+async def cart_products(db, product_ids) -> dict:
+    """{id string: {"_id", "price"}} for the products that exist, cache first"""
+    found = {}
+    missing = []
+    for product_id in product_ids:
+        cached = _products_cache.get(product_id)
+        if cached is None:
+            missing.append(product_id)
+        else:
+            found[product_id] = cached
+    if missing:
+        async for product in db.products.find(ids_filter(missing), {"price": 1}):
+            entry = {"_id": product["_id"], "price": product["price"]}
+            _products_cache.set(str(product["_id"]), entry)
+            found[str(product["_id"])] = entry
+    return found
+
+
+def empty_cart(user_id: str) -> dict:
+    """Cart returned to users who have no cart document"""
+    return {
+        "_id": "new",
+        "userId": user_id,
+        "items": [],
+        "updatedAt": datetime.utcnow()
+    }
+
+
+# Product fields joined into expanded cart lines
+EXPANDED_PRODUCT_FIELDS = ("name", "image", "price", "oldPrice", "discount", "stock", "inStock")
+
+
+def expanded_cart_pipeline(user_id: str) -> list:
+    """Aggregation returning the user's cart with its products in `products`"""
+    return [
+        {"$match": {"userId": user_id}},
+        {"$addFields": {"_productKeys": {"$concatArrays": [
+            {"$ifNull": ["$items.productId", []]},
+            {"$map": {"input": {"$ifNull": ["$items", []]}, "as": "item", "in": {"$convert": {
+                "input": "$$item.productId", "to": "objectId", "onError": None, "onNull": None
+            }}}}
+        ]}}},
+        {"$lookup": {
+            "from": "products",
+            "localField": "_productKeys",
+            "foreignField": "_id",
+            "as": "products"
+        }},
+        # Keep only the fields the cart shows; missing fields stay missing
+        {"$addFields": {"products": {"$map": {"input": "$products", "as": "product", "in": {
+            "_id": "$$product._id",
+            **{field: f"$$product.{field}" for field in EXPANDED_PRODUCT_FIELDS}
+        }}}}},
+        {"$project": {"_productKeys": 0}},
+    ]
+
+
+def hydrate_cart(cart: dict) -> dict:
+    """Merge the joined products into the cart lines and flag what changed"""
+    products = {str(product["_id"]): product for product in cart.pop("products", [])}
+    items = []
+    subtotal = 0.0
+    for item in cart.get("items", []):
+        product = products.get(item["productId"])
+        line = dict(item)
+        if product is None:
+            line.update(available=False, outOfStock=True)
+        else:
+            stock = product.get("stock") or 0
+            # Seed and backup products have no inStock field; Product defaults it to True
+            in_stock = product.get("inStock", True) is not False
+            current_price = product.get("price")
+            line.update(
+                name=product.get("name"),
+                image=product.get("image"),
+                currentPrice=current_price,
+                oldPrice=product.get("oldPrice"),
+                discount=product.get("discount") or 0,
+                stock=stock,
+                inStock=in_stock,
+                priceChanged=current_price is not None and round(current_price, 2) != round(item["price"], 2),
+                outOfStock=not in_stock or stock < item["quantity"],
+            )
+            if not line["outOfStock"] and current_price is not None:
+                subtotal += current_price * item["quantity"]
+        items.append(line)
+    cart["items"] = items
+    cart["subtotal"] = round(subtotal, 2)
+    return cart
+
+
+def _items():
+    return {"$ifNull": ["$items", []]}
+
+
+def _with_quantity(quantity) -> dict:
+    return {"productId": "$$item.productId", "quantity": quantity, "price": "$$item.price"}
+
+
+def _literal(product_id: str) -> dict:
+    # Client ids such as "$$item.productId" must not be read as expressions
+    return {"$literal": product_id}
+
+
+def _upsert_line_stage(product_id: str, quantity, line: dict) -> dict:
+    # product_id is a verified catalog id, so the appended line needs no escaping
+    return {"$set": {"items": {"$cond": [
+        {"$in": [_literal(product_id), {"$map": {"input": _items(), "as": "item", "in": "$$item.productId"}}]},
+        {"$map": {"input": _items(), "as": "item", "in": {"$cond": [
+            {"$eq": ["$$item.productId", _literal(product_id)]},
+            _with_quantity(quantity),
+            "$$item"
+        ]}}},
+        {"$concatArrays": [_items(), [line]]}
+    ]}}}
+
+
+def add_line_stage(product_id: str, quantity: int, price: float) -> dict:
+    """Pipeline stage adding `quantity` to the line of `product_id`, creating it if absent"""
+    line = {"productId": product_id, "quantity": quantity, "price": price}
+    return _upsert_line_stage(product_id, {"$add": ["$$item.quantity", quantity]}, line)
+
+
+def set_line_stage(product_id: str, quantity: int, price: float) -> dict:
+    """Pipeline stage setting the quantity of the line of `product_id`, creating it if absent"""
+    line = {"productId": product_id, "quantity": quantity, "price": price}
+    return _upsert_line_stage(product_id, quantity, line)
+
+
+def set_quantity_stage(product_id: str, quantity: int) -> dict:
+    """Pipeline stage setting the quantity of the line of `product_id`"""
+    return {"$set": {"items": {"$map": {"input": _items(), "as": "item", "in": {"$cond": [
+        {"$eq": ["$$item.productId", _literal(product_id)]},
+        _with_quantity(quantity),
+        "$$item"
+    ]}}}}}
+
+
+def remove_line_stage(product_id: str) -> dict:
+    """Pipeline stage dropping the line of `product_id`"""
+    return {"$set": {"items": {"$filter": {
+        "input": _items(), "as": "item", "cond": {"$ne": ["$$item.productId", _literal(product_id)]}
+    }}}}
+
+
+async def update_cart(db, user_id: str, update, upsert: bool = True, query: dict = None):
+    """Apply `update` to the user's cart in one round trip and return the new document.
+
+    Returns None when `query` (extra conditions) does not match and upsert is off.
+    """
+    if isinstance(update, list):
+        update = update + [{"$set": {"updatedAt": datetime.utcnow()}}]
+    else:
+        update = {**update, "$set": {**update.get("$set", {}), "updatedAt": datetime.utcnow()}}
+
+    for attempt in range(2):
+        try:
+            return await db.carts.find_one_and_update(
+                {"userId": user_id, **(query or {})},
+                update,
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent request created the cart first; the retry updates it
+            if attempt:
+                raise
+
+
+async def sweep_carts(db) -> int:
+    """Delete empty and abandoned carts; returns the number removed"""
+    now = datetime.utcnow()
+    result = await db.carts.delete_many({"$or": [
+        {"items": {"$size": 0}, "updatedAt": {"$lt": now - EMPTY_CART_GRACE}},
+        {"updatedAt": {"$lt": now - STALE_CART_AGE}},
+    ]})
+    return result.deleted_count
+
+
+async def run_cart_sweeper(db, interval: float = SWEEP_INTERVAL_SECONDS):
+    while True:
+        try:
+            removed = await sweep_carts(db)
+            if removed:
+                logger.info(f"✅ Cart sweep removed {removed} empty or abandoned carts")
+        except PyMongoError as e:
+            logger.error(f"❌ Cart sweep failed: {str(e)}")
+        await asyncio.sleep(interval)
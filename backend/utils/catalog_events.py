@@ -0,0 +1,154 @@
+"""
+Single place where catalog writes are announced.
+
+Routers call these hooks after a successful write; each hook updates the
+in-memory indexes and drops the cached responses the write affects.
+"""
+import asyncio
+import logging
+
+from utils import search, suggest, similarity
+from utils.search import search_index
+from utils.suggest import suggest_index
+from utils.similarity import similarity_index
+from utils.category_tree import category_tree
+from utils.response_cache import listing_cache
+from utils.cache import TTLCache
+from utils.http_cache import catalog_version
+from utils.homepage import homepage_snapshot
+from utils.category_menu import category_menu
+from utils.category_stats import category_stats
+
+logger = logging.getLogger(__name__)
+
+# Bulk writes touching more products than this rebuild the similarity index
+# instead of re-ranking the neighbours of each product
+SIMILARITY_UPSERT_LIMIT = 200
+
+# Fields behind the per-category counts and price ranges
+_STATS_FIELDS = {"price", "inStock", "stock", "category", "categoryPath"}
+
+# Short-lived caches that are simply cleared on any catalog write
+_volatile_caches = []
+
+
+def register_volatile_cache(cache: TTLCache):
+    """Clear `cache` on every product or category write"""
+    _volatile_caches.append(cache)
+    return cache
+
+
+def _clear_volatile():
+    for cache in _volatile_caches:
+        cache.clear()
+
+
+def _reindex(fields, before: dict, after: dict) -> bool:
+    """Whether an index reading `fields` has to see this write"""
+    return before is None or any(before.get(field) != after.get(field) for field in fields)
+
+
+def product_changed(before: dict = None, after: dict = None):
+    """A product was created (before=None), updated, or deleted (after=None)"""
+    if after is not None:
+        # Stock and rating writes skip the indexes that do not read them
+        if _reindex(search.INDEXED_FIELDS, before, after):
+            search_index.upsert(after)
+        if _reindex(suggest.INDEXED_FIELDS, before, after):
+            suggest_index.upsert(after)
+        if _reindex(similarity.INDEXED_FIELDS, before, after):
+            similarity_index.upsert(after)
+    elif before is not None:
+        search_index.remove(before["_id"])
+        suggest_index.remove(before["_id"])
+        similarity_index.remove(before["_id"])
+
+    # The category menu follows the stats generation on its own
+    category_stats.apply(before, after)
+    listing_cache.invalidate_product(before, after)
+    _clear_volatile()
+    homepage_snapshot.invalidate()
+    catalog_version.bump("products")
+
+
+def products_bulk_updated(db, products: list, fields):
+    """Many products were updated in place by one bulk write.
+
+    `products` are the documents after the write and `fields` every field
+    the write may have set. Indexes that read none of those fields are left
+    alone; the others re-index just the written products.
+    """
+    fields = set(fields)
+    if fields & search.INDEXED_FIELDS:
+        for product in products:
+            search_index.upsert(product)
+    if fields & suggest.INDEXED_FIELDS:
+        for product in products:
+            suggest_index.upsert(product)
+    if fields & similarity.INDEXED_FIELDS:
+        if len(products) > SIMILARITY_UPSERT_LIMIT:
+            _run_in_background(similarity_index.rebuild(db), "Similarity index rebuild")
+        else:
+            for product in products:
+                similarity_index.upsert(product)
+
+    if fields & _STATS_FIELDS:
+        # The documents before the write are unknown, so the counts are re-aggregated
+        moved = "categoryPath" in fields
+        category_stats.invalidate(None if moved else {
+            slug for product in products for slug in product.get("categoryPath") or ()
+        })
+    # Listings may have lost products too; without the old documents they cannot be matched
+    listing_cache.clear()
+    _clear_volatile()
+    homepage_snapshot.invalidate()
+    catalog_version.bump("products")
+
+
+def category_changed(slugs):
+    """Categories were created, renamed, moved or deleted.
+
+    `slugs` lists every affected slug (old and new names and their subtrees).
+    """
+    category_tree.invalidate()
+    suggest_index.invalidate_categories()
+    listing_cache.invalidate_categories(slugs)
+    _clear_volatile()
+    homepage_snapshot.invalidate()
+    category_menu.invalidate()
+    # Moves change the counts of old and new ancestors alike
+    category_stats.invalidate()
+    # Renames and moves rewrite product documents too
+    catalog_version.bump("categories", "products")
+
+
+_background_tasks = set()
+
+
+def _run_in_background(coro, description: str):
+    async def runner():
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"❌ {description} failed: {str(e)}")
+
+    task = asyncio.create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def catalog_reloaded(db):
+    """Products or categories were replaced in bulk (restore, import).
+
+    Caches are dropped immediately; in-memory indexes are rebuilt in the background.
+    """
+    category_tree.invalidate()
+    listing_cache.clear()
+    _clear_volatile()
+    homepage_snapshot.invalidate()
+    category_menu.invalidate()
+    category_stats.invalidate()
+    catalog_version.bump("categories", "products")
+    _run_in_background(search_index.rebuild(db), "Search index rebuild")
+    _run_in_background(suggest_index.rebuild(db), "Suggest index rebuild")
+    _run_in_background(similarity_index.rebuild(db), "Similarity index rebuild")
@@ -0,0 +1,102 @@
+"""
+Pre-encoded nested category tree.
+
+The storefront menu needs the whole hierarchy with product counts. It is
+built once from the in-memory category tree and utils.category_stats,
+encoded to JSON and gzip, and kept as bytes. Category writes and changed
+stats mark it stale; a debounced background task rebuilds it while the
+previous bytes keep being served.
+"""
+from datetime import datetime, timezone
+import asyncio
+import gzip
+import json
+import logging
+
+from utils.category_tree import category_tree
+from utils.category_stats import category_stats
+from utils.http_cache import catalog_version, make_etag
+
+logger = logging.getLogger(__name__)
+
+# Writes arriving within this window are folded into one rebuild
+REBUILD_DELAY_SECONDS = 1.0
+
+GZIP_LEVEL = 6
+
+
+def _node(slug: str) -> dict:
+    category = category_tree.categories[slug]
+    return {
+        "id": str(category["_id"]),
+        "name": category.get("name"),
+        "slug": slug,
+        "icon": category.get("icon"),
+        **category_stats.get(slug),
+        "children": [_node(child) for child in category_tree.children.get(slug, [])],
+    }
+
+
+class CategoryMenu:
+    """Nested category tree as JSON and gzip bytes with validators"""
+
+    def __init__(self):
+        self.body = None
+        self.gzipped = None
+        self.etag = None
+        self.gzip_etag = None
+        self.last_modified = None
+        self._db = None
+        self._generation = 0
+        self._stats_generation = None
+        self._lock = asyncio.Lock()
+        self._dirty = False
+        self._task = None
+
+    async def build(self, db):
+        """Rebuild the tree and replace the encoded bytes"""
+        self._db = db
+        async with self._lock:
+            self._dirty = False
+            await category_tree.ensure_loaded(db)
+            await category_stats.ensure_loaded(db)
+            self._stats_generation = category_stats.generation
+            tree = [_node(slug) for slug in category_tree.roots]
+
+            body = json.dumps(tree, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            self.body = body
+            self._generation += 1
+            # Each representation needs its own strong validator
+            self.etag = make_etag("category-tree", catalog_version.boot_id, self._generation)
+            self.gzip_etag = make_etag("category-tree", catalog_version.boot_id, self._generation, "gzip")
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        logger.info(f"✅ Category tree encoded ({len(self.body)} bytes, {len(self.gzipped)} gzipped)")
+
+    async def ensure_built(self, db):
+        if self.body is None:
+            await self.build(db)
+        elif self._stats_generation != category_stats.generation:
+            self.invalidate()
+
+    def invalidate(self):
+        """Schedule a rebuild; the current bytes are served until it finishes"""
+        if self._db is None:
+            # Never built - the first request builds it
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self):
+        while self._dirty:
+            await asyncio.sleep(REBUILD_DELAY_SECONDS)
+            try:
+                await self.build(self._db)
+            except Exception as e:
+                logger.error(f"❌ Category tree rebuild failed: {str(e)}")
+                return
+
+
+# Shared instance used by the categories router
+category_menu = CategoryMenu()
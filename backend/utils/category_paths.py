@@ -0,0 +1,73 @@
+"""
+Materialized category paths on products.
+
+Every product carries `categoryPath`: the slugs from its top-level category
+down to its own category. A multikey index on it turns "everything under
+category X" into a single equality match.
+"""
+from pymongo import UpdateMany
+from utils.category_tree import category_tree
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def category_path(db, slug: str) -> list:
+    """Root-to-leaf slugs for a product in category `slug`"""
+    if not slug:
+        return []
+    path = await category_tree.ancestors(db, slug)
+    return list(path) if path else [slug]
+
+
+async def sync_category_paths(db, slugs=None) -> int:
+    """Rewrite categoryPath for products in the given categories (all if None).
+
+    Only products whose stored path differs are touched, so the call is
+    idempotent and cheap when nothing changed. Returns the modified count.
+    """
+    await category_tree.ensure_loaded(db)
+    if slugs is None:
+        slugs = list(category_tree.categories)
+
+    operations = []
+    for slug in slugs:
+        path = list(category_tree.path_of(slug))
+        if path:
+            operations.append(UpdateMany(
+                {"category": slug, "categoryPath": {"$ne": path}},
+                {"$set": {"categoryPath": path}}
+            ))
+    if not operations:
+        return 0
+
+    result = await db.products.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def rename_category_slug(db, old_slug: str, new_slug: str) -> int:
+    """Move products from old_slug to new_slug and rewrite the slug inside every path"""
+    result = await db.products.bulk_write([
+        UpdateMany({"category": old_slug}, {"$set": {"category": new_slug}}),
+        UpdateMany(
+            {"categoryPath": old_slug},
+            {"$set": {"categoryPath.$[slug]": new_slug}},
+            array_filters=[{"slug": old_slug}]
+        ),
+    ], ordered=True)
+    return result.modified_count
+
+
+async def backfill_category_paths(db) -> int:
+    """Populate categoryPath on every product (categorized or not)"""
+    modified = await sync_category_paths(db)
+
+    # Products whose category is not in the tree still get a one-element path
+    result = await db.products.update_many(
+        {"categoryPath": {"$exists": False}, "category": {"$type": "string"}},
+        [{"$set": {"categoryPath": ["$category"]}}]
+    )
+    modified += result.modified_count
+
+    logger.info(f"✅ Category paths backfilled: {modified} products updated")
+    return modified
@@ -0,0 +1,236 @@
+"""
+Per-category product statistics.
+
+Every category keeps its product count, in-stock count and min/max price,
+with descendants included (a product counts towards every slug in its
+categoryPath). Product writes adjust the numbers in memory. Only removing
+the cheapest or most expensive product needs MongoDB: the affected
+categories are marked stale and re-aggregated in the background.
+
+A periodic full aggregation reconciles whatever drift is left (writes
+racing a refresh, changes made outside the API) and logs it.
+"""
+from datetime import datetime, timezone
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = 600
+
+# Writes arriving within this window are folded into one targeted refresh
+REFRESH_DELAY_SECONDS = 1.0
+
+_FIELDS = ("productCount", "inStockCount", "minPrice", "maxPrice")
+
+
+def _empty() -> dict:
+    return {"productCount": 0, "inStockCount": 0, "minPrice": None, "maxPrice": None}
+
+
+def _price(product: dict):
+    price = product.get("price")
+    return price if isinstance(price, (int, float)) else None
+
+
+def _in_stock(product: dict) -> bool:
+    # Seed and backup products have no inStock field; Product defaults it to True
+    return product.get("inStock", True) is not False
+
+
+def _pipeline(slugs=None) -> list:
+    pipeline = []
+    if slugs is not None:
+        pipeline.append({"$match": {"categoryPath": {"$in": slugs}}})
+    pipeline += [
+        {"$project": {"categoryPath": 1, "price": 1, "inStock": 1}},
+        {"$unwind": "$categoryPath"},
+    ]
+    if slugs is not None:
+        # Unwinding also yields the ancestors of the matched categories
+        pipeline.append({"$match": {"categoryPath": {"$in": slugs}}})
+    pipeline.append({"$group": {
+        "_id": "$categoryPath",
+        "productCount": {"$sum": 1},
+        "inStockCount": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$inStock", True]}, False]}, 1, 0]}},
+        "minPrice": {"$min": "$price"},
+        "maxPrice": {"$max": "$price"},
+    }})
+    return pipeline
+
+
+class CategoryStats:
+    """slug -> {productCount, inStockCount, minPrice, maxPrice}"""
+
+    def __init__(self):
+        self._stats = {}
+        self._stale = set()       # slugs whose min/max must be re-aggregated
+        self._touched = None      # slugs written while a refresh runs
+        self._lock = asyncio.Lock()
+        self._db = None
+        self._task = None
+        self._reconcile_task = None
+        self.ready = False
+        self.generation = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def get(self, slug: str) -> dict:
+        stats = self._stats.get(slug)
+        return dict(stats) if stats else _empty()
+
+    def snapshot(self) -> dict:
+        return {slug: dict(stats) for slug, stats in self._stats.items()}
+
+    def _changed(self):
+        self.generation += 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def apply(self, before: dict = None, after: dict = None):
+        """Adjust the stats for a product created (before=None), updated or deleted (after=None)"""
+        old_path = set((before or {}).get("categoryPath") or ())
+        new_path = set((after or {}).get("categoryPath") or ())
+        slugs = old_path | new_path
+        if not slugs:
+            return
+        previous = {slug: tuple(self.get(slug).values()) for slug in slugs}
+        stale = set()
+
+        if before is not None:
+            old_price = _price(before)
+            new_price = _price(after) if after is not None else None
+            for slug in old_path:
+                stats = self._stats.get(slug)
+                if stats is None:
+                    continue
+                stats["productCount"] -= 1
+                if _in_stock(before):
+                    stats["inStockCount"] -= 1
+                if stats["productCount"] <= 0:
+                    del self._stats[slug]
+                    continue
+                if old_price is None:
+                    continue
+                # The extreme may have left; the product's new price cannot stand in for it
+                stays = slug in new_path and new_price is not None
+                if old_price == stats["minPrice"] and not (stays and new_price <= old_price):
+                    stale.add(slug)
+                if old_price == stats["maxPrice"] and not (stays and new_price >= old_price):
+                    stale.add(slug)
+
+        if after is not None:
+            price = _price(after)
+            for slug in new_path:
+                stats = self._stats.setdefault(slug, _empty())
+                stats["productCount"] += 1
+                if _in_stock(after):
+                    stats["inStockCount"] += 1
+                if price is not None:
+                    if stats["minPrice"] is None or price < stats["minPrice"]:
+                        stats["minPrice"] = price
+                    if stats["maxPrice"] is None or price > stats["maxPrice"]:
+                        stats["maxPrice"] = price
+
+        if self._touched is not None:
+            self._touched |= slugs
+        if any(tuple(self.get(slug).values()) != previous[slug] for slug in slugs):
+            self._changed()
+        if stale:
+            self.invalidate(stale)
+
+    def invalidate(self, slugs=None):
+        """Re-aggregate the given categories (everything if None) in the background"""
+        if slugs is None:
+            self._stale = None
+        elif self._stale is not None:
+            self._stale |= set(slugs)
+        self._schedule()
+
+    async def refresh(self, db, slugs=None) -> int:
+        """Aggregate the stats of `slugs` (all if None); returns the number of categories that drifted"""
+        self._db = db
+        async with self._lock:
+            self._touched = set()
+            try:
+                fresh = {}
+                async for row in db.products.aggregate(_pipeline(list(slugs) if slugs is not None else None)):
+                    fresh[row.pop("_id")] = {field: row.get(field) for field in _FIELDS}
+            except BaseException:
+                touched, self._touched = self._touched, None
+                self._requeue(touched)
+                raise
+            touched, self._touched = self._touched, None
+
+            scope = set(self._stats) | set(fresh) if slugs is None else set(slugs)
+            drifted = 0
+            for slug in scope:
+                if slug in touched:
+                    # Written meanwhile - the aggregate may predate the write
+                    continue
+                current = self._stats.get(slug)
+                if current != fresh.get(slug):
+                    drifted += 1
+                    if slug in fresh:
+                        self._stats[slug] = fresh[slug]
+                    else:
+                        self._stats.pop(slug, None)
+            if drifted:
+                self._changed()
+            self._requeue(touched)
+            self.ready = True
+        return drifted
+
+    def _requeue(self, slugs):
+        if slugs and self._stale is not None:
+            self._stale |= slugs
+            self._schedule()
+
+    async def ensure_loaded(self, db):
+        if not self.ready:
+            await self.refresh(db)
+
+    def _schedule(self):
+        if self._db is None:
+            # Not loaded yet - the first load aggregates everything
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_stale())
+
+    async def _refresh_stale(self):
+        while self._stale is None or self._stale:
+            await asyncio.sleep(REFRESH_DELAY_SECONDS)
+            slugs, self._stale = self._stale, set()
+            try:
+                await self.refresh(self._db, slugs)
+            except Exception as e:
+                logger.error(f"❌ Category stats refresh failed: {str(e)}")
+                return
+
+    async def _reconcile(self, db, interval: float):
+        while True:
+            try:
+                loaded = self.ready
+                drifted = await self.refresh(db)
+                if not loaded:
+                    logger.info(f"✅ Category stats loaded: {len(self._stats)} categories")
+                elif drifted:
+                    logger.warning(f"Category stats reconciled: {drifted} categories had drifted")
+            except Exception as e:
+                logger.error(f"❌ Category stats reconciliation failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def start(self, db, interval: float = RECONCILE_INTERVAL_SECONDS):
+        """Load the stats now and reconcile them every `interval` seconds"""
+        self._db = db
+        if self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(self._reconcile(db, interval))
+
+    def stop(self):
+        for task in (self._reconcile_task, self._task):
+            if task is not None:
+                task.cancel()
+        self._reconcile_task = None
+        self._task = None
+
+
+# Shared instance used by utils.catalog_events and the categories router
+category_stats = CategoryStats()
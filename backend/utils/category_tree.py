@@ -0,0 +1,121 @@
+"""
+In-memory copy of the category hierarchy.
+
+The tree is loaded once and answers descendant/ancestor lookups from
+precomputed dicts. Category writes call invalidate(); the next lookup
+reloads it from MongoDB.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryTree:
+    """Category hierarchy keyed by slug"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._version = 0
+        self._loaded_version = -1
+        self.categories = {}      # slug -> category document
+        self.children = {}        # slug -> [child slugs]
+        self.roots = []           # top-level slugs
+        self._descendants = {}    # slug -> tuple of slugs (itself first, then all levels below)
+        self._ancestors = {}      # slug -> tuple of slugs (root first, itself last)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_version == self._version
+
+    def invalidate(self):
+        """Mark the tree stale; it is reloaded on next access"""
+        self._version += 1
+
+    async def ensure_loaded(self, db):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                version = self._version
+                categories = await db.categories.find(
+                    {},
+                    {"name": 1, "slug": 1, "icon": 1, "parentId": 1}
+                ).to_list(length=None)
+                self._build(categories)
+                self._loaded_version = version
+                logger.info(f"✅ Category tree loaded: {len(self.categories)} categories")
+
+    def _build(self, categories: list):
+        by_id = {str(cat["_id"]): cat for cat in categories if cat.get("slug")}
+        slug_of = {cat_id: cat["slug"] for cat_id, cat in by_id.items()}
+
+        categories_by_slug = {}
+        children = {}
+        roots = []
+        for cat_id, cat in by_id.items():
+            slug = cat["slug"]
+            categories_by_slug[slug] = cat
+            children.setdefault(slug, [])
+            parent_slug = slug_of.get(str(cat["parentId"])) if cat.get("parentId") else None
+            if parent_slug and parent_slug != slug:
+                children.setdefault(parent_slug, []).append(slug)
+            else:
+                roots.append(slug)
+
+        ancestors = {}
+        for slug in categories_by_slug:
+            path = [slug]
+            seen = {slug}
+            parent_id = categories_by_slug[slug].get("parentId")
+            while parent_id and str(parent_id) in slug_of:
+                parent_slug = slug_of[str(parent_id)]
+                if parent_slug in seen:
+                    # Corrupt data (parent cycle) - stop walking up
+                    break
+                path.append(parent_slug)
+                seen.add(parent_slug)
+                parent_id = categories_by_slug[parent_slug].get("parentId")
+            ancestors[slug] = tuple(reversed(path))
+
+        descendants = {}
+        for slug in categories_by_slug:
+            found = [slug]
+            stack = list(children[slug])
+            seen = {slug}
+            while stack:
+                child = stack.pop()
+                if child in seen:
+                    continue
+                seen.add(child)
+                found.append(child)
+                stack.extend(children.get(child, []))
+            descendants[slug] = tuple(found)
+
+        self.categories = categories_by_slug
+        self.children = children
+        self.roots = roots
+        self._ancestors = ancestors
+        self._descendants = descendants
+
+    def path_of(self, slug: str) -> tuple:
+        """Ancestor path from the already loaded tree, or () if unknown"""
+        return self._ancestors.get(slug, ())
+
+    def subtree_of(self, slug: str) -> tuple:
+        """Descendant slugs from the already loaded tree, or () if unknown"""
+        return self._descendants.get(slug, ())
+
+    async def descendants(self, db, slug: str) -> tuple:
+        """All slugs in the subtree of `slug` (itself included), or () if unknown"""
+        await self.ensure_loaded(db)
+        return self._descendants.get(slug, ())
+
+    async def ancestors(self, db, slug: str) -> tuple:
+        """Slugs from the root down to `slug`, or () if unknown"""
+        await self.ensure_loaded(db)
+        return self._ancestors.get(slug, ())
+
+
+# Shared instance used by the routers
+category_tree = CategoryTree()
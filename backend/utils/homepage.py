@@ -0,0 +1,121 @@
+"""
+Precomputed homepage snapshot.
+
+The homepage shows the same few product rails to every visitor: featured,
+new, discounted and a handful of products per top-level category. They are
+queried together, encoded once as ProductCard JSON and kept in memory.
+Catalog writes mark the snapshot stale; a debounced background task
+rebuilds it while the previous snapshot keeps being served.
+"""
+from pydantic import TypeAdapter
+from datetime import datetime, timezone
+from typing import List
+import asyncio
+import json
+import logging
+
+from models.product import ProductCard, CARD_FIELDS
+from utils.category_tree import category_tree
+from utils.http_cache import catalog_version, make_etag
+
+logger = logging.getLogger(__name__)
+
+RAIL_SIZE = 12
+CATEGORY_RAIL_SIZE = 8
+
+# Writes arriving within this window are folded into one rebuild
+REBUILD_DELAY_SECONDS = 1.0
+
+_cards = TypeAdapter(List[ProductCard])
+_projection = {field: 1 for field in CARD_FIELDS}
+
+
+async def _rail(db, query: dict, sort: list, limit: int) -> bytes:
+    products = await db.products.find(query, _projection).sort(sort).limit(limit).to_list(length=limit)
+    for product in products:
+        product["_id"] = str(product["_id"])
+    return _cards.dump_json(_cards.validate_python(products), by_alias=True)
+
+
+class HomepageSnapshot:
+    """Pre-encoded homepage body with its validators"""
+
+    def __init__(self):
+        self.body = None
+        self.etag = None
+        self.last_modified = None
+        self._db = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._dirty = False
+        self._task = None
+
+    async def build(self, db):
+        """Query every rail and replace the snapshot"""
+        self._db = db
+        async with self._lock:
+            self._dirty = False
+            await category_tree.ensure_loaded(db)
+            roots = [category_tree.categories[slug] for slug in category_tree.roots]
+
+            rails = await asyncio.gather(
+                _rail(db, {"featured": True}, [("createdAt", -1), ("_id", -1)], RAIL_SIZE),
+                _rail(db, {"isNew": True}, [("createdAt", -1), ("_id", -1)], RAIL_SIZE),
+                _rail(db, {"discount": {"$gt": 0}}, [("discount", -1), ("createdAt", -1), ("_id", -1)], RAIL_SIZE),
+                *(
+                    _rail(db, {"categoryPath": category["slug"]},
+                          [("popularity", -1), ("rating", -1), ("_id", -1)], CATEGORY_RAIL_SIZE)
+                    for category in roots
+                )
+            )
+            featured, new, discounted = rails[:3]
+
+            # Rails are already encoded; splice them into the envelope as raw JSON
+            categories = b",".join(
+                b'{"slug":' + json.dumps(category["slug"]).encode("utf-8")
+                + b',"name":' + json.dumps(category.get("name"), ensure_ascii=False).encode("utf-8")
+                + b',"icon":' + json.dumps(category.get("icon"), ensure_ascii=False).encode("utf-8")
+                + b',"products":' + rail + b"}"
+                for category, rail in zip(roots, rails[3:])
+            )
+            built_at = datetime.now(timezone.utc).replace(microsecond=0)
+            self.body = (
+                b'{"featured":' + featured
+                + b',"new":' + new
+                + b',"discounted":' + discounted
+                + b',"categories":[' + categories + b"]"
+                + b',"generatedAt":' + json.dumps(built_at.isoformat()).encode("utf-8")
+                + b"}"
+            )
+            self._generation += 1
+            self.etag = make_etag("home", catalog_version.boot_id, self._generation)
+            self.last_modified = built_at
+        logger.info(f"✅ Homepage snapshot built ({len(self.body)} bytes)")
+
+    async def get(self, db) -> bytes:
+        """Current snapshot, building it first if there is none yet"""
+        if self.body is None:
+            await self.build(db)
+        return self.body
+
+    def invalidate(self):
+        """Schedule a rebuild; the current snapshot is served until it finishes"""
+        if self._db is None:
+            # Never built - the first request builds it
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self):
+        while self._dirty:
+            await asyncio.sleep(REBUILD_DELAY_SECONDS)
+            try:
+                await self.build(self._db)
+            except Exception as e:
+                logger.error(f"❌ Homepage snapshot rebuild failed: {str(e)}")
+                return
+
+
+# Shared instance used by the home router
+homepage_snapshot = HomepageSnapshot()
@@ -0,0 +1,99 @@
+"""
+Conditional GET support (ETag / Last-Modified).
+
+Document responses derive their validators from the document's updatedAt.
+Collection responses use a per-scope version counter that catalog writes
+bump; it is combined with a per-process boot id so a restart never
+produces an ETag that collides with one issued before.
+"""
+from fastapi import Request, Response
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import uuid
+
+
+class CatalogVersion:
+    """Monotonic version counters per catalog scope ("products", "categories")"""
+
+    def __init__(self):
+        self.boot_id = uuid.uuid4().hex
+        self._versions = {}
+        self._modified = {}
+        self._started = _utc_now()
+
+    def bump(self, *scopes):
+        now = _utc_now()
+        for scope in scopes:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._modified[scope] = now
+
+    def version(self, *scopes) -> str:
+        return ".".join(str(self._versions.get(scope, 0)) for scope in scopes)
+
+    def last_modified(self, *scopes) -> datetime:
+        return max([self._modified.get(scope, self._started) for scope in scopes])
+
+    def etag(self, *scopes, key: str = "") -> str:
+        return make_etag(self.boot_id, self.version(*scopes), key)
+
+
+def _utc_now() -> datetime:
+    # HTTP dates have one-second resolution
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the given parts"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def to_http_datetime(value) -> datetime:
+    """Normalize a stored timestamp (datetime or ISO string) to an aware UTC datetime"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def validator_headers(etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime = None) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+
+    return False
+
+
+def not_modified(etag: str, last_modified: datetime = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+# Shared version counters bumped by utils.catalog_events
+catalog_version = CatalogVersion()
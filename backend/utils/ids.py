@@ -0,0 +1,20 @@
+from bson import ObjectId
+
+
+def id_candidates(value: str) -> list:
+    """Possible stored forms of an id string.
+
+    Products created through the API have ObjectId keys while the seed and
+    backup data use UUID strings, so a 24-hex id may be either.
+    """
+    if ObjectId.is_valid(value):
+        return [ObjectId(value), value]
+    return [value]
+
+
+def ids_filter(values) -> dict:
+    """_id filter matching any of the given id strings in either form"""
+    candidates = []
+    for value in values:
+        candidates.extend(id_candidates(value))
+    return {"_id": {"$in": candidates}}
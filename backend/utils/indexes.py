@@ -0,0 +1,171 @@
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry - one list of IndexModel per collection.
+# Every index is named explicitly so drift detection can compare by name.
+INDEX_REGISTRY = {
+    "products": [
+        # Category listings (multikey on the materialized path) with every sort option
+        IndexModel([("categoryPath", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="categoryPath_createdAt"),
+        IndexModel([("categoryPath", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)], name="categoryPath_price"),
+        IndexModel([("categoryPath", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)], name="categoryPath_rating"),
+        IndexModel([("categoryPath", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)], name="categoryPath_name"),
+        IndexModel([("categoryPath", ASCENDING), ("popularity", DESCENDING), ("_id", DESCENDING)], name="categoryPath_popularity"),
+        # Bulk import upsert keys; only products that have one are indexed
+        IndexModel(
+            [("sku", ASCENDING)],
+            name="sku_unique",
+            unique=True,
+            partialFilterExpression={"sku": {"$type": "string"}}
+        ),
+        IndexModel(
+            [("slug", ASCENDING)],
+            name="slug_unique",
+            unique=True,
+            partialFilterExpression={"slug": {"$type": "string"}}
+        ),
+        # Path maintenance (update_many by category slug)
+        IndexModel([("category", ASCENDING)], name="category"),
+        # Brand filter, usually combined with a price range
+        IndexModel([("brand", ASCENDING), ("price", ASCENDING)], name="brand_price"),
+        # Default listing (featured products, newest first)
+        IndexModel(
+            [("createdAt", DESCENDING), ("_id", DESCENDING)],
+            name="featured_createdAt",
+            partialFilterExpression={"featured": True}
+        ),
+        # Discounted products ("discount" filter, newest first); the range
+        # condition lives in the partial filter so the keys match the sort
+        IndexModel(
+            [("createdAt", DESCENDING), ("_id", DESCENDING)],
+            name="discounted_createdAt",
+            partialFilterExpression={"discount": {"$gt": 0}}
+        ),
+        IndexModel([("isNew", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="isNew_createdAt"),
+        IndexModel([("inStock", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="inStock_createdAt"),
+        # Unfiltered sorts, with the _id tiebreaker used by cursor pagination
+        IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price"),
+        IndexModel([("rating", DESCENDING), ("_id", DESCENDING)], name="rating"),
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name"),
+        IndexModel([("popularity", DESCENDING), ("_id", DESCENDING)], name="popularity"),
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)], name="createdAt"),
+    ],
+    "categories": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("parentId", ASCENDING)], name="parentId"),
+    ],
+    "carts": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+        # Cart sweep (empty and abandoned carts)
+        IndexModel([("updatedAt", ASCENDING)], name="updatedAt"),
+    ],
+    "wishlists": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "orders": [
+        IndexModel([("orderId", ASCENDING)], name="orderId_unique", unique=True),
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="userId_createdAt"),
+        IndexModel([("status", ASCENDING), ("createdAt", DESCENDING)], name="status_createdAt"),
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+    ],
+    "reviews": [
+        IndexModel([("productId", ASCENDING), ("createdAt", DESCENDING)], name="productId_createdAt"),
+        IndexModel([("productId", ASCENDING), ("userId", ASCENDING)], name="productId_userId"),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+}
+
+# Options that change the behaviour of an index and must match the registry
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _normalize_spec(spec: dict) -> dict:
+    """Reduce an index spec (from the registry or the server) to comparable fields"""
+    key = spec["key"]
+    if isinstance(key, dict):
+        key = list(key.items())
+    normalized = {"key": [(field, int(direction)) for field, direction in key]}
+    for option in _COMPARED_OPTIONS:
+        if spec.get(option) not in (None, False):
+            normalized[option] = spec[option]
+    return normalized
+
+
+async def check_index_drift(db) -> dict:
+    """Compare the indexes present on the server with INDEX_REGISTRY"""
+    report = {}
+    existing_collections = set(await db.list_collection_names())
+
+    for collection_name, models in INDEX_REGISTRY.items():
+        declared = {model.document["name"]: _normalize_spec(model.document) for model in models}
+        existing = {}
+        if collection_name in existing_collections:
+            info = await db[collection_name].index_information()
+            existing = {
+                name: _normalize_spec(spec)
+                for name, spec in info.items()
+                if name != "_id_"
+            }
+
+        report[collection_name] = {
+            "missing": sorted(name for name in declared if name not in existing),
+            "changed": sorted(
+                name for name in declared
+                if name in existing and existing[name] != declared[name]
+            ),
+            "unexpected": sorted(name for name in existing if name not in declared),
+        }
+
+    return report
+
+
+def has_drift(report: dict) -> bool:
+    """True if any collection in a drift report deviates from the registry"""
+    return any(
+        entry["missing"] or entry["changed"] or entry["unexpected"]
+        for entry in report.values()
+    )
+
+
+async def ensure_indexes(db) -> dict:
+    """Reconcile the database with INDEX_REGISTRY.
+
+    Missing indexes are created and indexes whose definition changed are rebuilt.
+    Indexes that are not in the registry are only reported, never dropped.
+    Returns the drift report computed after reconciliation.
+    """
+    before = await check_index_drift(db)
+
+    for collection_name, models in INDEX_REGISTRY.items():
+        entry = before[collection_name]
+        collection = db[collection_name]
+
+        for model in models:
+            name = model.document["name"]
+            if name not in entry["missing"] and name not in entry["changed"]:
+                continue
+            try:
+                if name in entry["changed"]:
+                    logger.warning(f"Index {collection_name}.{name} differs from registry, rebuilding")
+                    await collection.drop_index(name)
+                await collection.create_indexes([model])
+                logger.info(f"✅ Index created: {collection_name}.{name}")
+            except PyMongoError as e:
+                # e.g. duplicate values blocking a unique index - keep going with the rest
+                logger.error(f"❌ Failed to build index {collection_name}.{name}: {str(e)}")
+
+    after = await check_index_drift(db)
+    for collection_name, entry in after.items():
+        if entry["missing"] or entry["changed"]:
+            logger.warning(
+                f"Index drift on {collection_name}: missing={entry['missing']} changed={entry['changed']}"
+            )
+        if entry["unexpected"]:
+            logger.warning(f"Indexes not in registry on {collection_name}: {entry['unexpected']}")
+
+    return after
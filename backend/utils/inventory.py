@@ -0,0 +1,99 @@
+"""
+Stock reservation for checkout.
+
+All order lines are reserved with one unordered bulk_write of conditional
+updates: a line only matches while `stock >= quantity`, and the same
+pipeline update decrements stock, recomputes `inStock`, sets `updatedAt` and
+tags the product with the reservation id. MongoDB applies each update atomically, so
+concurrent checkouts on one product can never take more than is in stock.
+
+If some lines could not be reserved, the tagged products are put back and
+the caller gets the shortages. Once the order is stored the tags are removed.
+"""
+from pymongo import UpdateOne
+from datetime import datetime
+
+
+class InsufficientStock(Exception):
+    """Raised when one or more order lines cannot be reserved"""
+
+    def __init__(self, shortages: list):
+        self.shortages = shortages
+        super().__init__(f"Insufficient stock for {len(shortages)} product(s)")
+
+
+def _reserve_update(quantity: int, reservation_id: str, now: datetime) -> list:
+    return [
+        {"$set": {
+            "stock": {"$subtract": ["$stock", quantity]},
+            "reservations": {"$concatArrays": [{"$ifNull": ["$reservations", []]}, [reservation_id]]},
+            "updatedAt": now,
+        }},
+        {"$set": {"inStock": {"$gt": ["$stock", 0]}}},
+    ]
+
+
+async def release_stock(db, lines: dict, reservation_id: str) -> int:
+    """Give back the stock held by a reservation; safe to call more than once"""
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": product_id, "reservations": reservation_id},
+            {
+                "$inc": {"stock": quantity},
+                "$set": {"inStock": True, "updatedAt": now},
+                "$pull": {"reservations": reservation_id},
+            }
+        )
+        for product_id, quantity in lines.items()
+    ]
+    if not operations:
+        return 0
+    result = await db.products.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def reserve_stock(db, lines: dict, reservation_id: str, available: dict = None):
+    """Reserve {product _id: quantity} atomically or raise InsufficientStock.
+
+    `available` maps product ids to the stock seen before reserving and is
+    only used to fill in the shortage report.
+    """
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": product_id, "stock": {"$gte": quantity}},
+            _reserve_update(quantity, reservation_id, now)
+        )
+        for product_id, quantity in lines.items()
+    ]
+    if not operations:
+        return
+
+    result = await db.products.bulk_write(operations, ordered=False)
+    if result.modified_count == len(operations):
+        return
+
+    reserved = set(await db.products.distinct("_id", {
+        "_id": {"$in": list(lines)},
+        "reservations": reservation_id,
+    }))
+    await release_stock(db, {pid: qty for pid, qty in lines.items() if pid in reserved}, reservation_id)
+    available = available or {}
+    raise InsufficientStock([
+        {
+            "productId": str(product_id),
+            "requested": quantity,
+            "available": max(available.get(product_id) or 0, 0),
+        }
+        for product_id, quantity in lines.items()
+        if product_id not in reserved
+    ])
+
+
+async def confirm_reservation(db, lines: dict, reservation_id: str):
+    """Drop the reservation tags once the order is stored"""
+    await db.products.update_many(
+        {"_id": {"$in": list(lines)}, "reservations": reservation_id},
+        {"$pull": {"reservations": reservation_id}}
+    )
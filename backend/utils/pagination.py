@@ -0,0 +1,87 @@
+from bson import ObjectId, json_util
+from datetime import datetime
+import base64
+
+# Types a cursor value may take for each sort field (None stands for a missing field)
+_NUMBER = (int, float)
+_FIELD_TYPES = {
+    "price": _NUMBER,
+    "rating": _NUMBER,
+    "popularity": _NUMBER,
+    "name": (str,),
+    "createdAt": (datetime,),
+    "_id": (ObjectId, str),
+}
+_SCALAR = (int, float, str, datetime, ObjectId)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the sort"""
+
+
+def encode_cursor(sort_name: str, sort: list, document: dict) -> str:
+    """Opaque cursor pointing just after `document` for the given sort"""
+    payload = {"s": sort_name, "v": [document.get(field) for field, _ in sort]}
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_name: str, sort: list) -> list:
+    """Return the sort key values stored in a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        # Tampered cursors surface as binascii, JSON, bson (InvalidId...) or type errors
+        raise InvalidCursor("Malformed cursor")
+
+    if not isinstance(payload, dict) or payload.get("s") != sort_name:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    values = payload.get("v")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor("Malformed cursor")
+    for (field, _), value in zip(sort, values):
+        # Only plain values of the field's type may reach $gt/$lt - never operators or documents
+        if value is not None and (
+            isinstance(value, bool) or not isinstance(value, _FIELD_TYPES.get(field, _SCALAR))
+        ):
+            raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def _after(field: str, direction: int, value) -> dict:
+    """Condition matching values that sort strictly after `value`.
+
+    MongoDB sorts null/missing before every other value but comparison
+    operators never match null, so it needs explicit handling.
+    """
+    if direction == 1:
+        if value is None:
+            return {field: {"$ne": None}}
+        return {field: {"$gt": value}}
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: list, values: list) -> dict:
+    """Filter selecting documents after the cursor position.
+
+    For sort keys (k1, ..., kn) this is the lexicographic comparison
+    k1 > v1 OR (k1 = v1 AND k2 > v2) OR ... with ">" following each direction.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        condition = _after(field, direction, values[i])
+        if condition is None:
+            continue
+        equal_prefix = {sort[j][0]: values[j] for j in range(i)}
+        if equal_prefix:
+            branches.append({"$and": [equal_prefix, condition]})
+        else:
+            branches.append(condition)
+
+    if not branches:
+        # Cursor is at the very end of the ordering
+        return {"_id": {"$exists": False}}
+    return {"$or": branches}
@@ -0,0 +1,121 @@
+"""
+Write-behind popularity counters.
+
+Product views and add-to-cart events are counted in memory and flushed
+every few seconds as one unordered bulk_write of $inc updates, so the read
+path never writes to MongoDB.
+
+`popularity` is a forward-decayed score: an event at time t adds
+weight * 2 ** ((t - EPOCH) / HALF_LIFE). Newer events weigh exponentially
+more, so sorting by the stored sum ranks products by recent activity
+without ever rewriting old scores. The scale doubles every half-life, so
+float64 covers roughly 1000 half-lives (about 19 years at one week) after
+EPOCH; moving EPOCH forward requires scaling stored scores down by the
+same factor with $mul.
+"""
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+from utils.homepage import homepage_snapshot
+from utils.http_cache import catalog_version
+from utils.response_cache import listing_cache
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+HALF_LIFE_SECONDS = 7 * 24 * 3600
+
+# Relative weight of each event in the popularity score
+VIEW_WEIGHT = 1.0
+CART_ADD_WEIGHT = 5.0
+
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+def decay_factor(timestamp: float = None) -> float:
+    """Forward-decay multiplier for an event at `timestamp` (now by default)"""
+    if timestamp is None:
+        timestamp = time.time()
+    return 2.0 ** ((timestamp - EPOCH) / HALF_LIFE_SECONDS)
+
+
+class PopularityCounters:
+    """In-process buffer of counter increments per product _id"""
+
+    def __init__(self):
+        self._pending = {}   # product _id -> {"views": n, "cartAdds": n, "popularity": x}
+        self._task = None
+        self.flushes = 0
+
+    def _counters(self, product_id) -> dict:
+        counters = self._pending.get(product_id)
+        if counters is None:
+            counters = self._pending[product_id] = {"views": 0, "cartAdds": 0, "popularity": 0.0}
+        return counters
+
+    def _add(self, product_id, field: str, count: int, weight: float):
+        counters = self._counters(product_id)
+        counters[field] += count
+        counters["popularity"] += weight * count * decay_factor()
+
+    def record_view(self, product_id):
+        self._add(product_id, "views", 1, VIEW_WEIGHT)
+
+    def record_cart_add(self, product_id, quantity: int = 1):
+        self._add(product_id, "cartAdds", quantity, CART_ADD_WEIGHT)
+
+    async def flush(self, db) -> int:
+        """Write buffered increments; returns the number of products updated"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne(
+                {"_id": product_id},
+                {"$inc": {field: value for field, value in counters.items() if value}}
+            )
+            for product_id, counters in pending.items()
+        ]
+        try:
+            result = await db.products.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            # Put the increments back so the next flush retries them
+            for product_id, counters in pending.items():
+                merged = self._counters(product_id)
+                for field, value in counters.items():
+                    merged[field] += value
+            logger.error(f"❌ Popularity flush failed: {str(e)}")
+            return 0
+
+        self.flushes += 1
+        if result.modified_count:
+            # Cached sort_by=popular listings were ordered by the old scores
+            listing_cache.invalidate_sort("popular")
+            catalog_version.bump("popularity")
+            # So are the homepage category rails; the rebuild is debounced
+            homepage_snapshot.invalidate()
+        return len(operations)
+
+    async def _run(self, db, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush(db)
+
+    def start(self, db, interval: float = FLUSH_INTERVAL_SECONDS):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db, interval))
+
+    async def stop(self, db):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush(db)
+
+
+# Shared instance used by the products and cart routers
+popularity_counters = PopularityCounters()
@@ -0,0 +1,104 @@
+"""
+Operations for PATCH /api/products/bulk.
+
+A request holds per-product partial updates and/or one filter update (a
+`$set` template and an optional percentage discount). Everything becomes
+one list of write models for a single unordered bulk_write.
+"""
+from pymongo import UpdateOne, UpdateMany
+from datetime import datetime
+
+from models.product import ProductBulkUpdate, ProductBulkFilter
+from utils.category_paths import category_path
+from utils.ids import ids_filter
+from utils.product_query import in_stock_query
+
+# Largest number of per-product updates in one request
+MAX_BULK_UPDATES = 10000
+
+
+def bulk_filter_query(product_filter: ProductBulkFilter) -> dict:
+    """MongoDB query for a bulk filter; empty if it has no criteria"""
+    query = {}
+    if product_filter.category:
+        query["categoryPath"] = product_filter.category
+    if product_filter.brand:
+        query["brand"] = product_filter.brand
+    if product_filter.minPrice is not None or product_filter.maxPrice is not None:
+        query["price"] = {}
+        if product_filter.minPrice is not None:
+            query["price"]["$gte"] = product_filter.minPrice
+        if product_filter.maxPrice is not None:
+            query["price"]["$lte"] = product_filter.maxPrice
+    if product_filter.inStock is not None:
+        query.update(in_stock_query(product_filter.inStock))
+    return query
+
+
+def discount_stage(percent: int) -> dict:
+    """Pipeline stage applying `percent` off the list price (oldPrice, or price if unset).
+
+    Re-applying a discount starts from the list price again, and 0 restores it.
+    """
+    list_price = {"$ifNull": ["$oldPrice", "$price"]}
+    if percent == 0:
+        return {"$set": {"price": list_price, "oldPrice": None, "discount": 0}}
+    return {"$set": {
+        "oldPrice": list_price,
+        "price": {"$round": [{"$multiply": [list_price, (100 - percent) / 100]}, 2]},
+        "discount": percent,
+    }}
+
+
+async def _set_fields(db, update) -> dict:
+    fields = update.model_dump(exclude_unset=True)
+    fields.pop("id", None)
+    if "category" in fields:
+        fields["categoryPath"] = await category_path(db, fields["category"])
+    return fields
+
+
+async def build_bulk_operations(db, request: ProductBulkUpdate) -> tuple:
+    """(write models, request index per model, fields written); the filter update has index -1"""
+    now = datetime.utcnow()
+    operations = []
+    indexes = []
+    written = set()
+
+    for index, item in enumerate(request.updates):
+        fields = await _set_fields(db, item)
+        if not fields:
+            continue
+        fields["updatedAt"] = now
+        operations.append(UpdateOne(ids_filter([item.id]), {"$set": fields}))
+        indexes.append(index)
+        written.update(fields)
+
+    if request.filter is not None:
+        fields = await _set_fields(db, request.set) if request.set is not None else {}
+        fields["updatedAt"] = now
+        written.update(fields)
+        query = bulk_filter_query(request.filter)
+        if request.discountPercent is None:
+            operations.append(UpdateMany(query, {"$set": fields}))
+        else:
+            # Pipeline form so the new price is computed from each product's own price;
+            # template values are wrapped in $literal so strings are never read as field paths
+            operations.append(UpdateMany(query, [
+                {"$set": {name: {"$literal": value} for name, value in fields.items()}},
+                discount_stage(request.discountPercent),
+            ]))
+            written.update(("price", "oldPrice", "discount"))
+        indexes.append(-1)
+
+    return operations, indexes, written
+
+
+def bulk_targets_query(request: ProductBulkUpdate) -> dict:
+    """Query matching every product a bulk request may write"""
+    branches = []
+    if request.updates:
+        branches.append(ids_filter([item.id for item in request.updates]))
+    if request.filter is not None:
+        branches.append(bulk_filter_query(request.filter))
+    return branches[0] if len(branches) == 1 else {"$or": branches}
@@ -0,0 +1,205 @@
+"""
+Streaming bulk import of products from CSV or NDJSON.
+
+Rows are read one at a time, validated against ProductCreate and turned into
+upserts keyed on `sku` or `slug`. Upserts are sent as unordered bulk writes
+of `batch_size` operations, so memory use is bounded by one batch whatever
+the size of the file.
+
+Only the columns present in a row are written to an existing product; the
+model defaults for missing columns are applied when the product is created.
+"""
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import datetime
+import csv
+import io
+import json
+import time
+
+from models.product import ProductCreate
+from utils.category_tree import category_tree
+
+IMPORT_KEYS = ("sku", "slug")
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 1000
+
+# Errors kept in the report; the failed count covers all of them
+MAX_REPORTED_ERRORS = 100
+
+# CSV columns holding lists, separated by "|"
+_LIST_COLUMNS = ("images",)
+
+# Values given to columns a row leaves out when the product is created
+_INSERT_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in ProductCreate.model_fields.items()
+    if not field.is_required() and name not in IMPORT_KEYS
+}
+
+
+def detect_format(filename: str) -> str:
+    """Import format from a file name, or None if it is not recognized"""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def iter_csv_rows(stream):
+    """Yield (line, row) from a binary CSV stream; empty cells are omitted"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    for record in reader:
+        row = {}
+        for column, value in record.items():
+            if column is None or value is None:
+                continue
+            value = value.strip()
+            if value == "":
+                continue
+            if column in _LIST_COLUMNS:
+                value = [item.strip() for item in value.split("|") if item.strip()]
+            row[column.strip()] = value
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(stream):
+    """Yield (line, row) from a binary NDJSON stream; unparsable lines yield an error string"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, row
+
+
+def iter_rows(stream, file_format: str):
+    if file_format == "csv":
+        return iter_csv_rows(stream)
+    return iter_ndjson_rows(stream)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def build_upsert(row: dict, key: str, now: datetime):
+    """(key value, UpdateOne) for a row, or raise ValueError / ValidationError"""
+    product = ProductCreate.model_validate(row)
+    key_value = getattr(product, key)
+    if not key_value:
+        raise ValueError(f"{key}: Field required for import")
+
+    fields = product.model_dump(exclude_unset=True)
+    fields["categoryPath"] = list(category_tree.path_of(product.category) or (product.category,))
+    fields["updatedAt"] = now
+
+    on_insert = {name: value for name, value in _INSERT_DEFAULTS.items() if name not in fields}
+    on_insert.update({"rating": 0.0, "reviews": 0, "createdAt": now})
+
+    return key_value, UpdateOne(
+        {key: key_value},
+        {"$set": fields, "$setOnInsert": on_insert},
+        upsert=True
+    )
+
+
+class ProductImporter:
+    """Accumulates upserts from rows and flushes them in batches"""
+
+    def __init__(self, db, key: str = "sku", batch_size: int = DEFAULT_BATCH_SIZE):
+        if key not in IMPORT_KEYS:
+            raise ValueError(f"Import key must be one of {', '.join(IMPORT_KEYS)}")
+        self.db = db
+        self.key = key
+        self.batch_size = batch_size
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.errors = []
+        # Key value -> (line, operation); a later row for the same key replaces the earlier one
+        self._batch = {}
+
+    def _error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    async def add(self, line: int, row):
+        self.processed += 1
+        if isinstance(row, str):
+            self._error(line, row)
+            return
+        try:
+            key_value, operation = build_upsert(row, self.key, datetime.utcnow())
+        except ValidationError as e:
+            self._error(line, _validation_message(e))
+            return
+        except ValueError as e:
+            self._error(line, str(e))
+            return
+
+        if key_value in self._batch:
+            self.duplicates += 1
+        self._batch[key_value] = (line, operation)
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self._batch:
+            return
+        entries = list(self._batch.values())
+        self._batch = {}
+        try:
+            result = await self.db.products.bulk_write(
+                [operation for _, operation in entries],
+                ordered=False
+            )
+            details = {
+                "nUpserted": result.upserted_count,
+                "nMatched": result.matched_count,
+                "nModified": result.modified_count,
+            }
+        except BulkWriteError as e:
+            details = e.details
+            for write_error in details.get("writeErrors", []):
+                self._error(entries[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+
+        self.inserted += details.get("nUpserted", 0)
+        self.updated += details.get("nMatched", 0)
+
+    async def run(self, rows) -> dict:
+        """Import every (line, row) pair and return the report"""
+        started = time.monotonic()
+        await category_tree.ensure_loaded(self.db)
+        for line, row in rows:
+            await self.add(line, row)
+        await self.flush()
+
+        elapsed = time.monotonic() - started
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "elapsedSeconds": round(elapsed, 3),
+            "rowsPerSecond": round(self.processed / elapsed, 1) if elapsed else 0.0,
+        }
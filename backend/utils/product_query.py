@@ -0,0 +1,106 @@
+from typing import Optional
+from utils.search import search_index, fold_text
+import re
+
+
+class ProductFilters:
+    """Query-string filters shared by the product listing endpoints"""
+
+    def __init__(
+        self,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        is_new: Optional[bool] = None,
+        discount: Optional[bool] = None,
+        featured: Optional[bool] = None,
+    ):
+        self.category = category
+        self.brand = brand
+        self.search = search
+        self.min_price = min_price
+        self.max_price = max_price
+        self.in_stock = in_stock
+        self.is_new = is_new
+        self.discount = discount
+        self.featured = featured
+
+    def has_filters(self) -> bool:
+        """True if any filter was supplied (mirrors the original truthiness check)"""
+        return any([
+            self.category, self.brand, self.search, self.min_price, self.max_price,
+            self.in_stock, self.is_new, self.discount, self.featured
+        ])
+
+    def normalized(self) -> dict:
+        """Canonical form of the supplied filters, usable as a cache key"""
+        values = {
+            "category": self.category,
+            "brand": self.brand,
+            "search": " ".join(fold_text(self.search).split()) if self.search else None,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "in_stock": self.in_stock,
+            "is_new": self.is_new,
+            "discount": True if self.discount else None,
+            "featured": self.featured,
+        }
+        return {key: value for key, value in values.items() if value is not None}
+
+
+def in_stock_query(in_stock: bool) -> dict:
+    """Stock filter; seed and backup products have no inStock field and count as in stock"""
+    return {"inStock": {"$ne": False}} if in_stock else {"inStock": False}
+
+
+def build_product_query(filters: ProductFilters, default_featured: bool = True):
+    """Translate filters into a MongoDB query.
+
+    Returns (query, search_ids). search_ids lists every product _id matching
+    the search term, best first, when the in-memory search index answered it,
+    otherwise it is None. All hits go into the query, so the other filters
+    and the sort see the full match set.
+    """
+    query = {}
+
+    # If no filters are applied, return featured products
+    if default_featured and not filters.has_filters():
+        query["featured"] = True
+
+    if filters.category:
+        # categoryPath holds every ancestor slug, so one equality match covers the subtree
+        query["categoryPath"] = filters.category
+
+    if filters.brand:
+        query["brand"] = filters.brand
+    search_ids = None
+    if filters.search:
+        if search_index.ready:
+            # Ranked ids from the in-memory index, other filters still apply in MongoDB
+            search_ids = search_index.ranked_ids(filters.search)
+            query["_id"] = {"$in": search_ids}
+        else:
+            # Index still loading - fall back to a regex scan
+            query["$or"] = [
+                {"name": {"$regex": re.escape(filters.search), "$options": "i"}},
+                {"brand": {"$regex": re.escape(filters.search), "$options": "i"}}
+            ]
+    if filters.min_price is not None or filters.max_price is not None:
+        query["price"] = {}
+        if filters.min_price is not None:
+            query["price"]["$gte"] = filters.min_price
+        if filters.max_price is not None:
+            query["price"]["$lte"] = filters.max_price
+    if filters.in_stock is not None:
+        query.update(in_stock_query(filters.in_stock))
+    if filters.is_new is not None:
+        query["isNew"] = filters.is_new
+    if filters.discount:
+        query["discount"] = {"$gt": 0}
+    if filters.featured is not None:
+        query["featured"] = filters.featured
+
+    return query, search_ids
@@ -0,0 +1,226 @@
+"""
+"Customers also bought" recommendations from order history.
+
+Orders are streamed once to build a sparse item-item co-occurrence matrix
+(CSR arrays: indptr / indices / counts). Pairs are scored with the cosine
+of their order sets, count / sqrt(orders_i * orders_j), so best sellers do
+not dominate every list, and each product keeps its top-K neighbours in a
+compact (n_items, K) array that requests read directly.
+
+New orders are folded in as they are created: their pair counts go into a
+small delta map and only the rows of the ordered products, plus the lists
+that show them, are re-ranked.
+The delta is merged into the CSR arrays once it grows past a threshold.
+"""
+from array import array
+from collections import defaultdict
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 20
+
+# Pairs per order grow quadratically; very large orders say little about affinity
+MAX_ORDER_ITEMS = 50
+
+# Delta pairs kept before they are merged into the CSR arrays
+COMPACT_THRESHOLD = 50000
+
+
+class CoPurchaseIndex:
+    """Item-item co-occurrence counts with precomputed top-K neighbours"""
+
+    def __init__(self):
+        self._slots = {}                                    # product id -> dense index
+        self._ids = []                                      # dense index -> product id
+        self._orders = np.zeros(0)                          # orders containing each item
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.float64)
+        self._delta = defaultdict(lambda: defaultdict(int))  # row -> {column: extra count}
+        self._delta_size = 0
+        self._top = np.full((0, TOP_K), -1, dtype=np.int32)
+        self._top_scores = np.zeros((0, TOP_K), dtype=np.float32)
+        self.ready = False
+        self._rebuilding = False
+        self._pending = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _slot(self, product_id: str) -> int:
+        slot = self._slots.get(product_id)
+        if slot is None:
+            slot = self._slots[product_id] = len(self._ids)
+            self._ids.append(product_id)
+        return slot
+
+    def _grow(self):
+        """Extend per-item arrays after new ids were assigned"""
+        size = len(self._ids)
+        extra = size - len(self._orders)
+        if extra <= 0:
+            return
+        self._orders = np.concatenate([self._orders, np.zeros(extra)])
+        self._indptr = np.concatenate([self._indptr, np.full(extra, self._indptr[-1], dtype=np.int64)])
+        self._top = np.vstack([self._top, np.full((extra, TOP_K), -1, dtype=np.int32)])
+        self._top_scores = np.vstack([self._top_scores, np.zeros((extra, TOP_K), dtype=np.float32)])
+
+    @staticmethod
+    def _order_items(items) -> list:
+        product_ids = []
+        for item in items or []:
+            product_id = item.get("productId") if isinstance(item, dict) else item
+            if product_id and product_id not in product_ids:
+                product_ids.append(str(product_id))
+        return product_ids[:MAX_ORDER_ITEMS]
+
+    def _row(self, row: int) -> tuple:
+        """(columns, counts) of a row, CSR part and delta merged"""
+        start, end = self._indptr[row], self._indptr[row + 1]
+        columns, counts = self._indices[start:end], self._counts[start:end]
+        delta = self._delta.get(row)
+        if delta:
+            columns = np.concatenate([columns, np.fromiter(delta.keys(), dtype=np.int32, count=len(delta))])
+            counts = np.concatenate([counts, np.fromiter(delta.values(), dtype=np.float64, count=len(delta))])
+            columns, inverse = np.unique(columns, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts)
+        return columns, counts
+
+    def _rank_row(self, row: int):
+        columns, counts = self._row(row)
+        self._top[row] = -1
+        self._top_scores[row] = 0
+        if not len(columns):
+            return
+        scores = counts / np.sqrt(self._orders[row] * self._orders[columns])
+        if len(scores) > TOP_K:
+            best = np.argpartition(-scores, TOP_K - 1)[:TOP_K]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        self._top[row, :len(best)] = columns[best]
+        self._top_scores[row, :len(best)] = scores[best]
+
+    def _compact(self):
+        """Merge the delta map into the CSR arrays"""
+        rows = np.repeat(np.arange(len(self._ids), dtype=np.int64), np.diff(self._indptr))
+        extra_rows, extra_cols, extra_counts = array("q"), array("q"), array("d")
+        for row, columns in self._delta.items():
+            for column, count in columns.items():
+                extra_rows.append(row)
+                extra_cols.append(column)
+                extra_counts.append(count)
+        self._build_csr(
+            np.concatenate([rows, np.frombuffer(extra_rows, dtype=np.int64)]),
+            np.concatenate([self._indices.astype(np.int64), np.frombuffer(extra_cols, dtype=np.int64)]),
+            np.concatenate([self._counts, np.frombuffer(extra_counts, dtype=np.float64)]),
+        )
+        self._delta.clear()
+        self._delta_size = 0
+
+    def _build_csr(self, rows, columns, counts):
+        size = len(self._ids)
+        keys, inverse = np.unique(rows * size + columns, return_inverse=True)
+        summed = np.bincount(inverse, weights=counts) if len(keys) else np.zeros(0)
+        key_rows = keys // size if size else keys
+        self._indptr = np.concatenate([[0], np.cumsum(np.bincount(key_rows, minlength=size))]).astype(np.int64)
+        self._indices = (keys % size).astype(np.int32) if size else keys.astype(np.int32)
+        self._counts = summed
+
+    def add_order(self, items):
+        """Fold one new order into the counts and re-rank its products"""
+        if self._rebuilding:
+            self._pending.append(items)
+        product_ids = self._order_items(items)
+        if not product_ids:
+            return
+        slots = [self._slot(product_id) for product_id in product_ids]
+        self._grow()
+        for slot in slots:
+            self._orders[slot] += 1
+            for other in slots:
+                if other != slot:
+                    self._delta[slot][other] += 1
+                    self._delta_size += 1
+        # The ordered products' counts grew, which lowers their score in every list
+        # that shows them; lists that do not show them cannot gain them this way
+        affected = set(slots)
+        for slot in slots:
+            neighbours, _ = self._row(slot)
+            affected.update(neighbours[(self._top[neighbours] == slot).any(axis=1)].tolist())
+        for row in affected:
+            self._rank_row(row)
+        if self._delta_size > COMPACT_THRESHOLD:
+            self._compact()
+
+    def related(self, product_id: str, limit: int = 10) -> list:
+        """[(product id, score)] most often bought together with `product_id`"""
+        slot = self._slots.get(str(product_id))
+        if slot is None:
+            return []
+        columns = self._top[slot]
+        return [
+            (self._ids[column], float(score))
+            for column, score in zip(columns[:limit], self._top_scores[slot][:limit])
+            if column >= 0
+        ]
+
+    async def rebuild(self, db):
+        """Recompute everything from the orders collection"""
+        started = time.monotonic()
+        self._rebuilding = True
+        self._pending = []
+        try:
+            fresh = CoPurchaseIndex()
+            rows, columns, ordered = array("q"), array("q"), array("q")
+            order_count = 0
+            cursor = db.orders.find(
+                {"status": {"$ne": "cancelled"}},
+                {"items.productId": 1}
+            )
+            async for order in cursor:
+                slots = [fresh._slot(product_id) for product_id in self._order_items(order.get("items"))]
+                if not slots:
+                    continue
+                order_count += 1
+                ordered.extend(slots)
+                for slot in slots:
+                    for other in slots:
+                        if other != slot:
+                            rows.append(slot)
+                            columns.append(other)
+
+            size = len(fresh._ids)
+            rows = np.frombuffer(rows, dtype=np.int64)
+            fresh._build_csr(rows, np.frombuffer(columns, dtype=np.int64), np.ones(len(rows)))
+            fresh._orders = np.bincount(np.frombuffer(ordered, dtype=np.int64), minlength=size).astype(np.float64)
+            fresh._top = np.full((size, TOP_K), -1, dtype=np.int32)
+            fresh._top_scores = np.zeros((size, TOP_K), dtype=np.float32)
+            for row in range(size):
+                fresh._rank_row(row)
+
+            # Swap in the new arrays, then replay orders created meanwhile
+            pending = self._pending
+            for attr in ("_slots", "_ids", "_orders", "_indptr", "_indices", "_counts",
+                         "_delta", "_delta_size", "_top", "_top_scores"):
+                setattr(self, attr, getattr(fresh, attr))
+        finally:
+            self._rebuilding = False
+            self._pending = []
+
+        for items in pending:
+            self.add_order(items)
+
+        self.ready = True
+        logger.info(
+            f"✅ Co-purchase index built: {order_count} orders, {size} products, "
+            f"{len(self._counts)} pairs in {time.monotonic() - started:.2f}s"
+        )
+
+
+# Shared instance used by the products and orders routers
+co_purchase_index = CoPurchaseIndex()
@@ -0,0 +1,167 @@
+"""
+Response-level LRU cache for anonymous catalog listings.
+
+Entries hold the final encoded JSON body together with what is needed to
+invalidate them precisely: the filters and sort of the listing, the ids of
+the products it returned and the categories those products belong to.
+"""
+from collections import OrderedDict
+import time
+
+
+def product_matches(filters: dict, product: dict) -> bool:
+    """Whether a product document satisfies normalized listing filters.
+
+    `filters` is ProductFilters.normalized() plus the implicit featured
+    default. Search terms cannot be evaluated here, so a listing with a
+    search is treated as matching every product.
+    """
+    if product is None:
+        return False
+    if "search" in filters:
+        return True
+    if "category" in filters and filters["category"] not in (product.get("categoryPath") or [product.get("category")]):
+        return False
+    if "brand" in filters and product.get("brand") != filters["brand"]:
+        return False
+    price = product.get("price")
+    if "min_price" in filters and (price is None or price < filters["min_price"]):
+        return False
+    if "max_price" in filters and (price is None or price > filters["max_price"]):
+        return False
+    if "in_stock" in filters and (product.get("inStock", True) is not False) != filters["in_stock"]:
+        return False
+    if "is_new" in filters and product.get("isNew") != filters["is_new"]:
+        return False
+    if filters.get("discount") and not (product.get("discount") or 0) > 0:
+        return False
+    if "featured" in filters and product.get("featured") != filters["featured"]:
+        return False
+    return True
+
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "expires_at", "filters", "product_ids", "categories", "sort_by")
+
+    def __init__(self, body: bytes, headers: dict, expires_at: float,
+                 filters: dict, product_ids: set, categories: set, sort_by: str = None):
+        self.body = body
+        self.headers = headers
+        self.expires_at = expires_at
+        self.filters = filters
+        self.product_ids = product_ids
+        self.categories = categories
+        self.sort_by = sort_by
+
+
+class ResponseCache:
+    """LRU of encoded responses bounded by entry count, total bytes and TTL"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key, body: bytes, filters: dict, products: list, headers: dict = None, sort_by: str = None):
+        """Store an encoded listing; `products` are the raw documents it contains"""
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+
+        categories = set()
+        for product in products:
+            categories.update(product.get("categoryPath") or [product.get("category")])
+        self._entries[key] = CachedResponse(
+            body=body,
+            headers=headers or {},
+            expires_at=time.monotonic() + self.ttl,
+            filters=filters,
+            product_ids={str(product["_id"]) for product in products},
+            categories=categories,
+            sort_by=sort_by,
+        )
+        self._bytes += len(body)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def _invalidate_where(self, predicate) -> int:
+        stale = [key for key, entry in self._entries.items() if predicate(entry)]
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_product(self, before: dict = None, after: dict = None) -> int:
+        """Drop listings that showed the product or whose filters match it before or after the write"""
+        product = after or before
+        if product is None:
+            return 0
+        product_id = str(product["_id"])
+        return self._invalidate_where(
+            lambda entry: product_id in entry.product_ids
+            or product_matches(entry.filters, before)
+            or product_matches(entry.filters, after)
+        )
+
+    def invalidate_categories(self, slugs) -> int:
+        """Drop listings filtered by, or containing products of, any of the given categories"""
+        slugs = set(slugs)
+        return self._invalidate_where(
+            lambda entry: entry.filters.get("category") in slugs
+            or not entry.categories.isdisjoint(slugs)
+        )
+
+    def invalidate_sort(self, sort_by: str) -> int:
+        """Drop listings ordered by `sort_by`"""
+        return self._invalidate_where(lambda entry: entry.sort_by == sort_by)
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared cache for GET /api/products
+listing_cache = ResponseCache()
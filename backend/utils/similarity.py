@@ -0,0 +1,260 @@
+"""
+Content-based "similar products" index.
+
+Every product is encoded as a hashed, L2-normalized NumPy feature vector
+built from its category path, brand, price band, specifications and name
+tokens. Similarity is the dot product of two vectors. Only products under
+the same top-level category are compared, so the top-K lists for the whole
+catalog are computed as one matrix product per category, in row chunks.
+
+Writes re-encode the changed product, rank its neighbours and refresh the
+lists of the products it enters or leaves, without a full rebuild. Full
+rebuilds encode and rank in a worker thread, so requests keep being served.
+"""
+from zlib import crc32
+import asyncio
+import logging
+import math
+import time
+
+import numpy as np
+
+from utils.search import fold_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 256
+TOP_K = 20
+
+# Rows multiplied against a category at once during a rebuild
+CHUNK_ROWS = 512
+
+# Feature weights before normalization
+CATEGORY_WEIGHT = 1.0       # per path level, scaled up towards the leaf
+BRAND_WEIGHT = 1.0
+PRICE_WEIGHT = 1.0          # own band; neighbouring bands get half
+SPEC_WEIGHT = 0.5
+NAME_WEIGHT = 0.8           # shared across the name tokens
+
+# Prices in the same band differ by less than this factor
+PRICE_BAND_RATIO = 1.5
+
+# Product fields the index reads
+INDEXED_FIELDS = frozenset(("name", "brand", "price", "category", "categoryPath", "specifications"))
+
+
+def _hashed(features: dict) -> np.ndarray:
+    """Feature-hash {feature: weight} into a normalized vector (signed hashing)"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature, weight in features.items():
+        digest = crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % DIMENSIONS] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def product_features(product: dict) -> dict:
+    features = {}
+    path = product.get("categoryPath") or ([product["category"]] if product.get("category") else [])
+    for depth, slug in enumerate(path, start=1):
+        features[f"cat:{slug}"] = CATEGORY_WEIGHT * depth / len(path)
+
+    if product.get("brand"):
+        features[f"brand:{fold_text(str(product['brand']))}"] = BRAND_WEIGHT
+
+    price = product.get("price")
+    if isinstance(price, (int, float)) and price > 0:
+        band = math.floor(math.log(price) / math.log(PRICE_BAND_RATIO))
+        features[f"price:{band}"] = PRICE_WEIGHT
+        features[f"price:{band - 1}"] = PRICE_WEIGHT / 2
+        features[f"price:{band + 1}"] = PRICE_WEIGHT / 2
+
+    specifications = product.get("specifications")
+    if isinstance(specifications, dict):
+        for key, value in specifications.items():
+            features[f"spec:{fold_text(str(key))}={fold_text(str(value))}"] = SPEC_WEIGHT
+
+    tokens = set(tokenize(product.get("name")))
+    for token in tokens:
+        features[f"name:{token}"] = NAME_WEIGHT / math.sqrt(len(tokens))
+    return features
+
+
+def _group_of(product: dict) -> str:
+    path = product.get("categoryPath")
+    if path:
+        return path[0]
+    return product.get("category") or ""
+
+
+class SimilarityIndex:
+    """Product vectors in dense slots with precomputed top-K neighbours"""
+
+    def __init__(self):
+        self._slots = {}                                    # product id -> slot
+        self._ids = []                                      # slot -> product id (None when free)
+        self._free = []
+        self._group_ids = {}                                # group name -> int
+        self._vectors = np.zeros((0, DIMENSIONS), dtype=np.float32)
+        self._groups = np.zeros(0, dtype=np.int32)          # slot -> group int, -1 when free
+        self._top = np.full((0, TOP_K), -1, dtype=np.int32)
+        self._top_scores = np.zeros((0, TOP_K), dtype=np.float32)
+        self.ready = False
+        self._rebuilding = False
+        self._pending = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _group(self, name: str) -> int:
+        group = self._group_ids.get(name)
+        if group is None:
+            group = self._group_ids[name] = len(self._group_ids)
+        return group
+
+    def _allocate(self, product_id: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = product_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(product_id)
+            if slot >= len(self._groups):
+                capacity = max(64, 2 * len(self._groups))
+                extra = capacity - len(self._groups)
+                self._vectors = np.vstack([self._vectors, np.zeros((extra, DIMENSIONS), dtype=np.float32)])
+                self._groups = np.concatenate([self._groups, np.full(extra, -1, dtype=np.int32)])
+                self._top = np.vstack([self._top, np.full((extra, TOP_K), -1, dtype=np.int32)])
+                self._top_scores = np.vstack([self._top_scores, np.zeros((extra, TOP_K), dtype=np.float32)])
+        self._slots[product_id] = slot
+        return slot
+
+    def _rank(self, rows: np.ndarray, members: np.ndarray):
+        """Recompute the top-K lists of `rows` against `members` (one category)"""
+        if not len(rows):
+            return
+        member_vectors = self._vectors[members]
+        k = min(TOP_K, len(members) - 1)
+        for start in range(0, len(rows), CHUNK_ROWS):
+            chunk = rows[start:start + CHUNK_ROWS]
+            scores = self._vectors[chunk] @ member_vectors.T
+            # A product is never similar to itself
+            scores[chunk[:, None] == members[None, :]] = -np.inf
+            self._top[chunk] = -1
+            self._top_scores[chunk] = 0
+            if k <= 0:
+                continue
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            self._top[chunk, :k] = members[np.take_along_axis(best, order, axis=1)]
+            self._top_scores[chunk, :k] = np.take_along_axis(best_scores, order, axis=1)
+
+    def _members(self, group: int) -> np.ndarray:
+        return np.flatnonzero(self._groups == group)
+
+    def _refresh_around(self, slot: int, group: int):
+        """Re-rank `slot` and every list it now enters or used to be part of"""
+        members = self._members(group)
+        self._rank(np.array([slot]), members)
+        scores = self._vectors[members] @ self._vectors[slot]
+        enters = (scores > self._top_scores[members, TOP_K - 1]) | (self._top[members, TOP_K - 1] < 0)
+        listed = (self._top[members] == slot).any(axis=1)
+        affected = members[(enters | listed) & (members != slot)]
+        self._rank(affected, members)
+
+    def upsert(self, product: dict):
+        """Add or re-encode a product and refresh the affected neighbour lists"""
+        if self._rebuilding:
+            self._pending.append(("upsert", product))
+        product_id = str(product["_id"])
+        slot = self._slots.get(product_id)
+        old_group = None
+        if slot is None:
+            slot = self._allocate(product_id)
+        else:
+            old_group = int(self._groups[slot])
+
+        group = self._group(_group_of(product))
+        self._vectors[slot] = _hashed(product_features(product))
+        self._groups[slot] = group
+        self._refresh_around(slot, group)
+        if old_group is not None and old_group != group:
+            # Lists in the old category that pointed at it
+            members = self._members(old_group)
+            self._rank(members[(self._top[members] == slot).any(axis=1)], members)
+
+    def remove(self, product_id):
+        if self._rebuilding:
+            self._pending.append(("remove", product_id))
+        slot = self._slots.pop(str(product_id), None)
+        if slot is None:
+            return
+        group = int(self._groups[slot])
+        self._groups[slot] = -1
+        self._vectors[slot] = 0
+        self._top[slot] = -1
+        self._top_scores[slot] = 0
+        self._ids[slot] = None
+        self._free.append(slot)
+        members = self._members(group)
+        self._rank(members[(self._top[members] == slot).any(axis=1)], members)
+
+    def similar(self, product_id: str, limit: int = 10) -> list:
+        """[(product id, score)] most similar to `product_id`"""
+        slot = self._slots.get(str(product_id))
+        if slot is None:
+            return []
+        return [
+            (self._ids[column], float(score))
+            for column, score in zip(self._top[slot][:limit], self._top_scores[slot][:limit])
+            if column >= 0
+        ]
+
+    @classmethod
+    def _built_from(cls, products: list) -> "SimilarityIndex":
+        """New index holding `products`, every category ranked (CPU-bound)"""
+        index = cls()
+        for product in products:
+            slot = index._allocate(str(product["_id"]))
+            index._vectors[slot] = _hashed(product_features(product))
+            index._groups[slot] = index._group(_group_of(product))
+        for group in index._group_ids.values():
+            members = index._members(group)
+            index._rank(members, members)
+        return index
+
+    async def rebuild(self, db):
+        """Encode the whole catalog and rank every category in batch"""
+        started = time.monotonic()
+        self._rebuilding = True
+        self._pending = []
+        try:
+            products = await db.products.find({}, {field: 1 for field in INDEXED_FIELDS}).to_list(length=None)
+            # Encoding and ranking take seconds at catalog scale; keep them off the event loop
+            fresh = await asyncio.to_thread(SimilarityIndex._built_from, products)
+
+            # Swap in the new arrays, then replay writes made meanwhile
+            pending = self._pending
+            for attr in ("_slots", "_ids", "_free", "_group_ids", "_vectors", "_groups", "_top", "_top_scores"):
+                setattr(self, attr, getattr(fresh, attr))
+        finally:
+            self._rebuilding = False
+            self._pending = []
+
+        for action, payload in pending:
+            if action == "upsert":
+                self.upsert(payload)
+            else:
+                self.remove(payload)
+
+        self.ready = True
+        logger.info(
+            f"✅ Similarity index built: {len(self)} products in {len(self._group_ids)} categories "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+
+# Shared instance used by the products router
+similarity_index = SimilarityIndex()
@@ -0,0 +1,325 @@
+"""
+In-memory prefix index for search-box autocomplete.
+
+Every product name, brand and category name is folded like the search index
+and stored once per word start ("apple iphone 15" is reachable from "apple",
+"iphone" and "15"). The phrases are kept in a sorted list so a prefix maps to
+one contiguous range; a parallel NumPy array of owner slots lets the range be
+ranked by score without looping in Python.
+"""
+from bisect import bisect_left
+import logging
+import math
+import time
+
+import numpy as np
+
+from utils.search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Word starts indexed per label and the stored phrase length
+MAX_WORD_STARTS = 6
+MAX_PHRASE_LENGTH = 32
+
+# Candidates taken from a prefix range before removing duplicate owners
+CANDIDATE_FACTOR = 4
+
+# Product fields the index reads
+INDEXED_FIELDS = frozenset((
+    "name", "brand", "category", "categoryPath", "price", "image", "rating", "reviews"
+))
+
+
+def phrases_of(label) -> list:
+    """Folded phrases starting at each word of `label`"""
+    tokens = tokenize(label)
+    phrases = []
+    for i in range(min(len(tokens), MAX_WORD_STARTS)):
+        phrase = " ".join(tokens[i:])[:MAX_PHRASE_LENGTH]
+        if phrase not in phrases:
+            phrases.append(phrase)
+    return phrases
+
+
+def fold_query(query: str) -> str:
+    return " ".join(tokenize(query))[:MAX_PHRASE_LENGTH]
+
+
+class PrefixIndex:
+    """Sorted phrases pointing at scored entries"""
+
+    def __init__(self):
+        self._phrases = []                              # sorted folded phrases
+        self._owners = np.empty(0, dtype=np.int32)      # phrase position -> slot
+        self._scores = np.zeros(0)                      # slot -> score
+        self._slots = {}                                # key -> slot
+        self._entries = []                              # slot -> (key, payload, phrases) or None
+        self._free = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def load(self, items):
+        """Replace the contents with (key, label, payload, score) items in one pass"""
+        pairs = []
+        entries = []
+        scores = []
+        slots = {}
+        for key, label, payload, score in items:
+            phrases = phrases_of(label)
+            slot = len(entries)
+            slots[key] = slot
+            entries.append((key, payload, phrases))
+            scores.append(score)
+            pairs.extend((phrase, slot) for phrase in phrases)
+        pairs.sort()
+
+        self._phrases = [phrase for phrase, _ in pairs]
+        self._owners = np.fromiter((slot for _, slot in pairs), dtype=np.int32, count=len(pairs))
+        self._scores = np.array(scores, dtype=np.float64)
+        self._slots = slots
+        self._entries = entries
+        self._free = []
+
+    def upsert(self, key, label, payload, score: float):
+        slot = self._slots.get(key)
+        phrases = phrases_of(label)
+        if slot is not None and self._entries[slot][2] == phrases:
+            # Same label - only the payload and score change
+            self._entries[slot] = (key, payload, phrases)
+            self._scores[slot] = score
+            return
+        self.remove(key)
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._entries)
+            self._entries.append(None)
+            if slot >= len(self._scores):
+                self._scores = np.resize(self._scores, max(16, 2 * len(self._scores)))
+        self._slots[key] = slot
+        self._entries[slot] = (key, payload, phrases)
+        self._scores[slot] = score
+
+        positions = []
+        for phrase in sorted(phrases):
+            position = bisect_left(self._phrases, phrase)
+            self._phrases.insert(position, phrase)
+            positions.append(position)
+        # np.insert expects indices into the array before insertion
+        before = [position - i for i, position in enumerate(positions)]
+        self._owners = np.insert(self._owners, before, slot)
+
+    def remove(self, key):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        positions = []
+        for phrase in self._entries[slot][2]:
+            position = bisect_left(self._phrases, phrase)
+            while self._owners[position] != slot:
+                position += 1
+            positions.append(position)
+        for position in sorted(positions, reverse=True):
+            del self._phrases[position]
+        self._owners = np.delete(self._owners, positions)
+        self._entries[slot] = None
+        self._scores[slot] = 0.0
+        self._free.append(slot)
+
+    def set_score(self, key, score: float):
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._scores[slot] = score
+
+    def top(self, prefix: str, limit: int) -> list:
+        """Payloads of the best scored entries with a phrase starting with `prefix`"""
+        if not prefix or limit <= 0:
+            return []
+        lo = bisect_left(self._phrases, prefix)
+        hi = bisect_left(self._phrases, prefix + "\uffff", lo)
+        if lo == hi:
+            return []
+
+        owners = self._owners[lo:hi]
+        wanted = limit * CANDIDATE_FACTOR
+        candidates = owners
+        if len(owners) > wanted:
+            candidates = np.unique(owners[np.argpartition(-self._scores[owners], wanted - 1)[:wanted]])
+            if len(candidates) < limit:
+                # One entry owns most of the range; fall back to every owner
+                candidates = owners
+        candidates = np.unique(candidates)
+        ranked = candidates[np.argsort(-self._scores[candidates], kind="stable")][:limit]
+        return [self._entries[slot][1] for slot in ranked]
+
+
+def _product_score(product: dict) -> float:
+    """Rating weighted by how many people rated it"""
+    return (product.get("rating") or 0) * (1 + math.log1p(product.get("reviews") or 0))
+
+
+class SuggestIndex:
+    """Product, brand and category suggestions kept in sync with catalog writes"""
+
+    def __init__(self):
+        self.products = PrefixIndex()
+        self.brands = PrefixIndex()
+        self.categories = PrefixIndex()
+        self._facts = {}             # product _id -> (brand, categoryPath)
+        self._brand_counts = {}
+        self._category_counts = {}
+        self._categories_stale = True
+        self.ready = False
+        self._rebuilding = False
+        self._pending = []
+
+    # Product side
+
+    def _count_brand(self, brand, delta: int):
+        if not brand:
+            return
+        count = self._brand_counts.get(brand, 0) + delta
+        if count > 0:
+            self._brand_counts[brand] = count
+            self.brands.upsert(brand, brand, {"name": brand}, count)
+        else:
+            self._brand_counts.pop(brand, None)
+            self.brands.remove(brand)
+
+    def _count_categories(self, path, delta: int):
+        for slug in path:
+            count = self._category_counts.get(slug, 0) + delta
+            if count > 0:
+                self._category_counts[slug] = count
+            else:
+                self._category_counts.pop(slug, None)
+            self.categories.set_score(slug, max(count, 0))
+
+    def _forget(self, product_id):
+        facts = self._facts.pop(product_id, None)
+        if facts is not None:
+            brand, path = facts
+            self._count_brand(brand, -1)
+            self._count_categories(path, -1)
+
+    def upsert(self, product: dict):
+        if self._rebuilding:
+            self._pending.append(("upsert", product))
+        product_id = str(product["_id"])
+        self._forget(product_id)
+        self.products.upsert(product_id, product.get("name"), _product_payload(product_id, product), _product_score(product))
+
+        brand = product.get("brand")
+        path = tuple(product.get("categoryPath") or ([product["category"]] if product.get("category") else []))
+        self._facts[product_id] = (brand, path)
+        self._count_brand(brand, 1)
+        self._count_categories(path, 1)
+
+    def remove(self, product_id):
+        if self._rebuilding:
+            self._pending.append(("remove", product_id))
+        product_id = str(product_id)
+        self._forget(product_id)
+        self.products.remove(product_id)
+
+    # Category side
+
+    def invalidate_categories(self):
+        """Category names or slugs changed; reload them from the tree on next use"""
+        self._categories_stale = True
+
+    async def _ensure_categories(self, db):
+        from utils.category_tree import category_tree
+
+        if not self._categories_stale and category_tree.loaded:
+            return
+        await category_tree.ensure_loaded(db)
+        self._categories_stale = False
+        self.categories.load(
+            (slug, category.get("name") or slug,
+             {"slug": slug, "name": category.get("name") or slug},
+             self._category_counts.get(slug, 0))
+            for slug, category in category_tree.categories.items()
+        )
+
+    # Queries
+
+    async def suggest(self, db, query: str, limit: int = 8) -> dict:
+        prefix = fold_query(query)
+        await self._ensure_categories(db)
+
+        brands = [
+            {**payload, "count": self._brand_counts.get(payload["name"], 0)}
+            for payload in self.brands.top(prefix, limit)
+        ]
+        categories = [
+            {**payload, "count": self._category_counts.get(payload["slug"], 0)}
+            for payload in self.categories.top(prefix, limit)
+        ]
+        return {
+            "query": query,
+            "products": self.products.top(prefix, limit),
+            "brands": brands,
+            "categories": categories,
+        }
+
+    async def rebuild(self, db):
+        """Reload every product from MongoDB"""
+        started = time.monotonic()
+        self._rebuilding = True
+        self._pending = []
+        try:
+            products = []
+            facts = {}
+            brand_counts = {}
+            category_counts = {}
+            cursor = db.products.find({}, {field: 1 for field in INDEXED_FIELDS})
+            async for product in cursor:
+                product_id = str(product["_id"])
+                products.append((product_id, product.get("name"), _product_payload(product_id, product), _product_score(product)))
+                brand = product.get("brand")
+                path = tuple(product.get("categoryPath") or ([product["category"]] if product.get("category") else []))
+                facts[product_id] = (brand, path)
+                if brand:
+                    brand_counts[brand] = brand_counts.get(brand, 0) + 1
+                for slug in path:
+                    category_counts[slug] = category_counts.get(slug, 0) + 1
+
+            self.products.load(products)
+            self.brands.load((brand, brand, {"name": brand}, count) for brand, count in brand_counts.items())
+            self._facts = facts
+            self._brand_counts = brand_counts
+            self._category_counts = category_counts
+            self._categories_stale = True
+            pending = self._pending
+        finally:
+            self._rebuilding = False
+            self._pending = []
+
+        for action, payload in pending:
+            if action == "upsert":
+                self.upsert(payload)
+            else:
+                self.remove(payload)
+
+        self.ready = True
+        logger.info(
+            f"✅ Suggest index built: {len(self.products)} products, {len(self.brands)} brands "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+
+def _product_payload(product_id: str, product: dict) -> dict:
+    return {
+        "_id": product_id,
+        "name": product.get("name"),
+        "price": product.get("price"),
+        "image": product.get("image"),
+    }
+
+
+# Shared instance used by the products router
+suggest_index = SuggestIndex()
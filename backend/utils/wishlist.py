@@ -0,0 +1,72 @@
+"""
+Wishlist writes and the per-user membership cache.
+
+Adds and removals are single find_one_and_update calls ($addToSet / $pull
+with upsert) returning the new document. Product listings can mark the
+products a user has wishlisted; the ids are kept per user in a small
+in-memory cache that every write refreshes from the returned document.
+"""
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+
+from utils.cache import TTLCache
+from utils.ids import ids_filter
+
+
+async def product_exists(db, product_id: str) -> bool:
+    """Whether the catalog has `product_id` (stored as ObjectId or string)"""
+    return await db.products.find_one(ids_filter([product_id]), {"_id": 1}) is not None
+
+
+def empty_wishlist(user_id: str) -> dict:
+    """Wishlist returned to users who have no wishlist document"""
+    return {
+        "_id": "new",
+        "userId": user_id,
+        "products": [],
+        "updatedAt": datetime.utcnow()
+    }
+
+
+async def update_wishlist(db, user_id: str, update: dict, upsert: bool = True):
+    """Apply `update` to the user's wishlist in one round trip and return the new document"""
+    update = {**update, "$set": {**update.get("$set", {}), "updatedAt": datetime.utcnow()}}
+    for attempt in range(2):
+        try:
+            wishlist = await db.wishlists.find_one_and_update(
+                {"userId": user_id},
+                update,
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            # A concurrent request created the wishlist first; the retry updates it
+            if attempt:
+                raise
+    wishlist_members.set(user_id, wishlist.get("products", []) if wishlist else [])
+    return wishlist
+
+
+class WishlistMembership:
+    """user id -> frozenset of wishlisted product ids"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, db, user_id: str) -> frozenset:
+        members = self._cache.get(user_id)
+        if members is None:
+            wishlist = await db.wishlists.find_one({"userId": user_id}, {"products": 1})
+            members = self.set(user_id, wishlist.get("products", []) if wishlist else [])
+        return members
+
+    def set(self, user_id: str, product_ids) -> frozenset:
+        members = frozenset(product_ids)
+        self._cache.set(user_id, members)
+        return members
+
+
+# Shared instance used by the wishlist and products routers
+wishlist_members = WishlistMembership()
@@ -0,0 +1,31 @@
+"""Plain helpers shared by the tests"""
+import asyncio
+import uuid
+from datetime import datetime
+
+
+def product_doc(**fields) -> dict:
+    """Product document as stored by the seed scripts (UUID _id, no inStock field)"""
+    now = datetime.utcnow()
+    doc = {
+        "_id": str(uuid.uuid4()),
+        "name": "Product",
+        "description": "",
+        "price": 100.0,
+        "category": "laptopuri",
+        "categoryPath": ["laptopuri"],
+        "brand": "Brand",
+        "stock": 10,
+        "rating": 0.0,
+        "reviews": 0,
+        "featured": True,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+    doc.update(fields)
+    return doc
+
+
+def run_async(coro):
+    """Run a coroutine outside the app (unit tests of utils)"""
+    return asyncio.run(coro)
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from utils.cart import (
+    EMPTY_CART_GRACE, STALE_CART_AGE, cart_products, expanded_cart_pipeline, hydrate_cart, sweep_carts, update_cart
+)
+from utils.catalog_events import product_changed
+
+from tests.helpers import product_doc
+from tests.test_orders import ADDRESS
+
+
+def _lines(cart):
+    return {item["productId"]: item["quantity"] for item in cart["items"]}
+
+
+def test_adding_twice_bumps_the_quantity(client, run, db, user_headers):
+    first, second = product_doc(price=50.0), product_doc(price=20.0)
+    run(db.products.insert_many, [first, second])
+
+    client.post("/api/cart/items", headers=user_headers, json={"productId": first["_id"], "quantity": 1})
+    client.post("/api/cart/items", headers=user_headers, json={"productId": second["_id"], "quantity": 3})
+    response = client.post("/api/cart/items", headers=user_headers, json={"productId": first["_id"], "quantity": 2})
+    assert response.status_code == 200
+    assert _lines(response.json()) == {first["_id"]: 3, second["_id"]: 3}
+    assert run(db.carts.count_documents, {}) == 1
+
+    response = client.put(f"/api/cart/items/{second['_id']}", headers=user_headers, json={"quantity": 1})
+    assert _lines(response.json()) == {first["_id"]: 3, second["_id"]: 1}
+    response = client.put("/api/cart/items/missing", headers=user_headers, json={"quantity": 1})
+    assert response.status_code == 404
+
+
+def test_adding_an_unknown_product_is_rejected(client, user_headers):
+    response = client.post("/api/cart/items", headers=user_headers, json={"productId": "missing", "quantity": 1})
+    assert response.status_code == 404
+
+
+def test_product_prices_are_cached_until_the_catalog_changes(client, run, db):
+    product = product_doc(price=50.0)
+    run(db.products.insert_one, product)
+    assert run(cart_products, db, [product["_id"]])[product["_id"]]["price"] == 50.0
+
+    run(db.products.update_one, {"_id": product["_id"]}, {"$set": {"price": 40.0}})
+    assert run(cart_products, db, [product["_id"]])[product["_id"]]["price"] == 50.0
+
+    run(product_changed, product, {**product, "price": 40.0})
+    assert run(cart_products, db, [product["_id"]])[product["_id"]]["price"] == 40.0
+
+
+def test_update_retries_after_a_concurrent_insert(client, run, db, monkeypatch):
+    collection = type(db.carts)
+    original = collection.find_one_and_update
+    calls = []
+
+    async def racing(self, *args, **kwargs):
+        calls.append(kwargs.get("upsert"))
+        if len(calls) == 1:
+            # The other request's upsert lands between our match and our insert
+            await original(self, *args, **kwargs)
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one_and_update", racing)
+    cart = run(update_cart, db, "user", {"$set": {"items": []}})
+    assert len(calls) == 2
+    assert cart["userId"] == "user"
+    assert run(db.carts.count_documents, {"userId": "user"}) == 1
+
+
+def test_reading_a_missing_cart_stores_nothing(client, run, db, user_headers):
+    response = client.get("/api/cart", headers=user_headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert run(db.carts.count_documents, {}) == 0
+
+
+def test_clearing_and_ordering_delete_the_cart(client, run, db, user_headers):
+    product = product_doc(_id=ObjectId(), stock=5)
+    run(db.products.insert_one, product)
+    product_id = str(product["_id"])
+
+    client.post("/api/cart/items", headers=user_headers, json={"productId": product_id, "quantity": 1})
+    assert client.delete("/api/cart", headers=user_headers).status_code == 204
+    assert run(db.carts.count_documents, {}) == 0
+
+    client.post("/api/cart/items", headers=user_headers, json={"productId": product_id, "quantity": 1})
+    order = {
+        "items": [{"productId": product_id, "name": "x", "price": 0, "quantity": 1, "image": ""}],
+        "shippingAddress": ADDRESS,
+    }
+    assert client.post("/api/orders", headers=user_headers, json=order).status_code == 201
+    assert run(db.carts.count_documents, {}) == 0
+
+
+def test_sweep_removes_empty_and_abandoned_carts(client, run, db):
+    now = datetime.utcnow()
+    line = [{"productId": "p", "quantity": 1, "price": 1.0}]
+    run(db.carts.insert_many, [
+        {"userId": "fresh-empty", "items": [], "updatedAt": now},
+        {"userId": "old-empty", "items": [], "updatedAt": now - EMPTY_CART_GRACE - timedelta(minutes=1)},
+        {"userId": "active", "items": line, "updatedAt": now - timedelta(days=30)},
+        {"userId": "abandoned", "items": line, "updatedAt": now - STALE_CART_AGE - timedelta(days=1)},
+    ])
+
+    assert run(sweep_carts, db) == 2
+    remaining = {cart["userId"] for cart in run(db.carts.find({}).to_list, None)}
+    assert remaining == {"fresh-empty", "active"}
+
+
+def test_hydrate_cart_flags_changed_lines():
+    # mongomock has no $convert, so the join is covered by feeding hydrate_cart its output
+    created = ObjectId()
+    cart = {
+        "_id": ObjectId(),
+        "userId": "user",
+        "items": [
+            {"productId": "seeded", "quantity": 2, "price": 50.0},
+            {"productId": str(created), "quantity": 3, "price": 20.0},
+            {"productId": "deleted", "quantity": 1, "price": 30.0},
+        ],
+        "products": [
+            # Seed products have no inStock field and count as in stock
+            {"_id": "seeded", "name": "Seed", "price": 45.0, "stock": 10},
+            {"_id": created, "name": "Created", "price": 20.0, "stock": 1, "inStock": True},
+        ],
+    }
+
+    hydrated = hydrate_cart(cart)
+    lines = {item["productId"]: item for item in hydrated["items"]}
+    assert "products" not in hydrated
+    assert lines["seeded"]["inStock"] is True and lines["seeded"]["outOfStock"] is False
+    assert lines["seeded"]["priceChanged"] is True and lines["seeded"]["currentPrice"] == 45.0
+    assert lines[str(created)]["outOfStock"] is True
+    assert lines["deleted"]["available"] is False
+    assert hydrated["subtotal"] == 90.0
+
+
+def test_expanded_cart_uses_a_plain_lookup():
+    [lookup] = [stage["$lookup"] for stage in expanded_cart_pipeline("user") if "$lookup" in stage]
+    # localField together with pipeline/let needs MongoDB 5.0
+    assert not {"pipeline", "let"} & set(lookup)
+
+
+def test_expanded_missing_cart_is_empty(client, run, db, user_headers):
+    response = client.get("/api/cart", headers=user_headers, params={"expand": "products"})
+    assert response.json()["items"] == [] and response.json()["subtotal"] == 0
+    assert run(db.carts.count_documents, {}) == 0
+
+
+def test_hostile_product_ids_match_no_other_line(client, run, db, user_headers):
+    first, second = product_doc(), product_doc()
+    run(db.products.insert_many, [first, second])
+    for product in (first, second):
+        client.post("/api/cart/items", headers=user_headers, json={"productId": product["_id"], "quantity": 2})
+    hostile = "$$item.productId"
+
+    response = client.post("/api/cart/batch", headers=user_headers, json={"operations": [
+        {"op": "remove", "productId": hostile},
+        {"op": "remove", "productId": first["_id"]},
+    ]})
+    assert response.status_code == 200
+    assert _lines(response.json()) == {second["_id"]: 2}
+
+    response = client.put(f"/api/cart/items/{hostile}", headers=user_headers, json={"quantity": 5})
+    assert response.status_code == 404
+    response = client.delete(f"/api/cart/items/{hostile}", headers=user_headers)
+    assert _lines(response.json()) == {second["_id"]: 2}
+    response = client.delete(f"/api/cart/items/{second['_id']}", headers=user_headers)
+    assert response.json()["items"] == []
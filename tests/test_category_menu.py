@@ -0,0 +1,67 @@
+import gzip
+
+from bson import ObjectId
+
+from utils.category_menu import category_menu
+from utils.category_stats import category_stats
+from utils.category_tree import category_tree
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    laptops = ObjectId()
+    run(db.categories.insert_many, [
+        {"_id": laptops, "name": "Laptopuri", "slug": "laptopuri", "icon": "laptop"},
+        {"_id": ObjectId(), "name": "Gaming", "slug": "laptopuri-gaming", "parentId": str(laptops)},
+    ])
+    run(db.products.insert_many, [
+        product_doc(),
+        product_doc(category="laptopuri-gaming", categoryPath=["laptopuri", "laptopuri-gaming"], price=5000.0),
+    ])
+    category_tree.invalidate()
+    run(category_stats.refresh, db)
+
+
+async def _rebuilt():
+    await category_menu._task
+
+
+def test_tree_is_nested_with_counts_and_gzip(client, run, db):
+    _seed(run, db)
+    plain = client.get("/api/categories/tree", headers={"Accept-Encoding": "identity"})
+    [root] = plain.json()
+    assert (root["slug"], root["productCount"], root["minPrice"], root["maxPrice"]) == ("laptopuri", 2, 100.0, 5000.0)
+    assert [child["slug"] for child in root["children"]] == ["laptopuri-gaming"]
+    assert root["children"][0]["productCount"] == 1
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    zipped = client.get("/api/categories/tree", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    assert gzip.decompress(category_menu.gzipped) == category_menu.body
+
+    assert client.get("/api/categories/tree", headers={
+        "Accept-Encoding": "identity", "If-None-Match": plain.headers["etag"]
+    }).status_code == 304
+
+
+def test_tree_follows_category_and_product_writes(client, run, db, admin_headers):
+    _seed(run, db)
+    etag = client.get("/api/categories/tree", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    response = client.post("/api/categories", headers=admin_headers, json={"name": "Mouse", "slug": "mouse"})
+    assert response.status_code == 201
+    run(_rebuilt)
+    tree = client.get("/api/categories/tree", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert tree.status_code == 200
+    assert {node["slug"] for node in tree.json()} == {"laptopuri", "mouse"}
+
+    client.post("/api/products", headers=admin_headers, json={
+        "name": "MX", "category": "mouse", "brand": "Logitech", "price": 300
+    })
+    # Stats moved on; the next request schedules the rebuild and the one after serves it
+    client.get("/api/categories/tree")
+    run(_rebuilt)
+    counts = {node["slug"]: node["productCount"] for node in client.get("/api/categories/tree").json()}
+    assert counts == {"laptopuri": 2, "mouse": 1}
@@ -0,0 +1,57 @@
+from bson import ObjectId
+
+from utils.category_paths import backfill_category_paths
+from utils.category_tree import category_tree
+
+from tests.helpers import product_doc
+
+
+def _seed_categories(run, db):
+    laptops, gaming, accessories = ObjectId(), ObjectId(), ObjectId()
+    run(db.categories.insert_many, [
+        {"_id": laptops, "name": "Laptopuri", "slug": "laptopuri"},
+        {"_id": gaming, "name": "Gaming", "slug": "laptopuri-gaming", "parentId": str(laptops)},
+        {"_id": accessories, "name": "Accesorii", "slug": "accesorii"},
+    ])
+    # Inserted behind the API's back, so the tree loaded at startup is stale
+    category_tree.invalidate()
+    return laptops, gaming, accessories
+
+
+def test_created_product_gets_its_category_path(client, run, db, admin_headers):
+    _seed_categories(run, db)
+    response = client.post("/api/products", headers=admin_headers, json={
+        "name": "Nitro", "category": "laptopuri-gaming", "brand": "Acer", "price": 4999
+    })
+    assert response.status_code == 201
+    assert response.json()["categoryPath"] == ["laptopuri", "laptopuri-gaming"]
+
+
+def test_moving_a_category_rewrites_product_paths(client, run, db, admin_headers):
+    _, gaming, accessories = _seed_categories(run, db)
+    product = product_doc(category="laptopuri-gaming", categoryPath=["laptopuri", "laptopuri-gaming"])
+    run(db.products.insert_one, product)
+
+    response = client.put(f"/api/categories/{gaming}", headers=admin_headers, json={"parentId": str(accessories)})
+    assert response.status_code == 200
+
+    stored = run(db.products.find_one, {"_id": product["_id"]})
+    assert stored["categoryPath"] == ["accesorii", "laptopuri-gaming"]
+    listed = client.get("/api/products", params={"category": "accesorii"}).json()
+    assert [item["_id"] for item in listed] == [product["_id"]]
+    assert client.get("/api/products", params={"category": "laptopuri"}).json() == []
+
+
+def test_backfill_sets_missing_paths(client, run, db):
+    _seed_categories(run, db)
+    # Products outside the tree are left out: mongomock cannot evaluate ["$category"]
+    stale = product_doc(category="laptopuri-gaming", categoryPath=["laptopuri-gaming"])
+    missing = product_doc(category="laptopuri-gaming")
+    del missing["categoryPath"]
+    run(db.products.insert_many, [stale, missing])
+
+    assert run(backfill_category_paths, db) == 2
+    for doc in (stale, missing):
+        assert run(db.products.find_one, {"_id": doc["_id"]})["categoryPath"] == ["laptopuri", "laptopuri-gaming"]
+    # Idempotent
+    assert run(backfill_category_paths, db) == 0
@@ -0,0 +1,64 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from utils.category_stats import CategoryStats
+
+from tests.helpers import product_doc, run_async
+
+
+def _products():
+    return [
+        # Seed/backup products carry no inStock field
+        product_doc(_id="a", price=100.0, categoryPath=["laptopuri", "gaming"]),
+        product_doc(_id="b", price=300.0, categoryPath=["laptopuri"]),
+        product_doc(_id="c", price=200.0, categoryPath=["laptopuri", "gaming"], inStock=False, stock=0),
+    ]
+
+
+def _loaded(products):
+    async def load():
+        db = AsyncMongoMockClient()["r32_stats"]
+        await db.products.insert_many(products)
+        stats = CategoryStats()
+        await stats.refresh(db)
+        return db, stats
+
+    return run_async(load())
+
+
+def test_aggregation_counts_missing_in_stock_as_in_stock():
+    _, stats = _loaded(_products())
+    assert stats.get("laptopuri") == {"productCount": 3, "inStockCount": 2, "minPrice": 100.0, "maxPrice": 300.0}
+    assert stats.get("gaming") == {"productCount": 2, "inStockCount": 1, "minPrice": 100.0, "maxPrice": 200.0}
+
+
+@pytest.mark.parametrize("change", ["create", "restock", "sell_out", "move", "delete_cheapest"])
+def test_incremental_apply_matches_a_fresh_aggregation(change):
+    products = _products()
+    db, stats = _loaded(products)
+    before, after = {
+        "create": (None, product_doc(_id="d", price=50.0, categoryPath=["laptopuri", "gaming"])),
+        "restock": (products[2], {**products[2], "inStock": True, "stock": 3}),
+        "sell_out": (products[0], {**products[0], "inStock": False, "stock": 0}),
+        "move": (products[1], {**products[1], "categoryPath": ["telefoane"]}),
+        "delete_cheapest": (products[0], None),
+    }[change]
+
+    async def write():
+        if before is None:
+            await db.products.insert_one(after)
+        elif after is None:
+            await db.products.delete_one({"_id": before["_id"]})
+        else:
+            await db.products.replace_one({"_id": before["_id"]}, after)
+        stats.apply(before, after)
+        # Removing an extreme price marks the category stale; refresh what was marked
+        stale, stats._stale = stats._stale, set()
+        if stale:
+            await stats.refresh(db, stale)
+        fresh = CategoryStats()
+        await fresh.refresh(db)
+        return fresh
+
+    fresh = run_async(write())
+    assert stats.snapshot() == fresh.snapshot()
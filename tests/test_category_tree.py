@@ -0,0 +1,68 @@
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from utils.category_tree import CategoryTree
+
+from tests.helpers import product_doc, run_async
+
+
+def _categories():
+    laptops, gaming, mice = ObjectId(), ObjectId(), ObjectId()
+    return [
+        {"_id": laptops, "name": "Laptopuri", "slug": "laptopuri"},
+        {"_id": gaming, "name": "Gaming", "slug": "laptopuri-gaming", "parentId": str(laptops)},
+        {"_id": ObjectId(), "name": "Ultra", "slug": "gaming-ultra", "parentId": str(gaming)},
+        {"_id": mice, "name": "Mouse", "slug": "mouse"},
+        # Dangling parent: treated as a top-level category
+        {"_id": ObjectId(), "name": "Orfan", "slug": "orfan", "parentId": "000000000000000000000001"},
+    ]
+
+
+def test_descendants_and_ancestors_span_every_level():
+    tree = CategoryTree()
+    tree._build(_categories())
+    assert set(tree.subtree_of("laptopuri")) == {"laptopuri", "laptopuri-gaming", "gaming-ultra"}
+    assert tree.subtree_of("laptopuri")[0] == "laptopuri"
+    assert tree.path_of("gaming-ultra") == ("laptopuri", "laptopuri-gaming", "gaming-ultra")
+    assert set(tree.roots) == {"laptopuri", "mouse", "orfan"}
+    assert tree.subtree_of("unknown") == ()
+
+
+def test_parent_cycle_is_cut():
+    first, second = ObjectId(), ObjectId()
+    tree = CategoryTree()
+    tree._build([
+        {"_id": first, "slug": "a", "parentId": str(second)},
+        {"_id": second, "slug": "b", "parentId": str(first)},
+    ])
+    assert set(tree.path_of("a")) == {"a", "b"}
+    assert set(tree.subtree_of("a")) == {"a", "b"}
+
+
+def test_invalidate_reloads_from_the_database():
+    async def scenario():
+        db = AsyncMongoMockClient()["r32_tree"]
+        await db.categories.insert_many(_categories())
+        tree = CategoryTree()
+        assert len(await tree.descendants(db, "laptopuri")) == 3
+
+        await db.categories.insert_one({"name": "Nou", "slug": "nou", "parentId": str(
+            (await db.categories.find_one({"slug": "gaming-ultra"}))["_id"])})
+        # Still served from memory until invalidated
+        assert len(await tree.descendants(db, "laptopuri")) == 3
+        tree.invalidate()
+        assert "nou" in await tree.descendants(db, "laptopuri")
+        assert await tree.ancestors(db, "nou") == ("laptopuri", "laptopuri-gaming", "gaming-ultra", "nou")
+
+    run_async(scenario())
+
+
+def test_category_filter_reaches_third_level_products(client, run, db):
+    categories = _categories()
+    run(db.categories.insert_many, categories)
+    leaf = product_doc(category="gaming-ultra", categoryPath=["laptopuri", "laptopuri-gaming", "gaming-ultra"])
+    other = product_doc(category="mouse", categoryPath=["mouse"])
+    run(db.products.insert_many, [leaf, other])
+
+    response = client.get("/api/products", params={"category": "laptopuri"})
+    assert [product["_id"] for product in response.json()] == [leaf["_id"]]
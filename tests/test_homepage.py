@@ -0,0 +1,74 @@
+from bson import ObjectId
+
+from utils.category_tree import category_tree
+from utils.homepage import RAIL_SIZE, homepage_snapshot
+from utils.popularity import popularity_counters
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    run(db.categories.insert_one, {"_id": ObjectId(), "name": "Laptopuri", "slug": "laptopuri", "icon": "laptop"})
+    category_tree.invalidate()
+    products = [product_doc(name=f"Featured {i}", featured=True) for i in range(RAIL_SIZE + 2)]
+    products += [
+        product_doc(name="New", featured=False, isNew=True),
+        product_doc(name="Sale", featured=False, discount=20),
+        product_doc(name="Popular", featured=False, popularity=99.0),
+    ]
+    run(db.products.insert_many, products)
+    run(homepage_snapshot.build, db)
+
+
+def test_snapshot_holds_every_rail_as_cards(client, run, db):
+    _seed(run, db)
+    response = client.get("/api/home")
+    body = response.json()
+
+    assert len(body["featured"]) == RAIL_SIZE
+    assert [card["name"] for card in body["new"]] == ["New"]
+    assert [card["name"] for card in body["discounted"]] == ["Sale"]
+    [laptops] = body["categories"]
+    assert (laptops["slug"], laptops["icon"]) == ("laptopuri", "laptop")
+    assert laptops["products"][0]["name"] == "Popular"
+    assert set(laptops["products"][0]) == {"_id", "name", "price", "oldPrice", "image", "rating", "discount"}
+
+    assert client.get("/api/home", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_product_writes_rebuild_the_snapshot(client, run, db, admin_headers):
+    _seed(run, db)
+    etag = client.get("/api/home").headers["etag"]
+
+    response = client.post("/api/products", headers=admin_headers, json={
+        "name": "Fresh", "category": "laptopuri", "brand": "Acer", "price": 10, "isNew": True
+    })
+    assert response.status_code == 201
+    # The rebuild is debounced in the background; wait for it like a later visitor would
+    async def rebuilt():
+        await homepage_snapshot._task
+
+    run(rebuilt)
+
+    fresh = client.get("/api/home", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["new"][0]["name"] == "Fresh"
+
+
+def test_popularity_flush_reorders_category_rails(client, run, db):
+    _seed(run, db)
+    response = client.get("/api/home")
+    [laptops] = response.json()["categories"]
+    runner_up = next(product for product in laptops["products"] if product["name"] != "Popular")
+
+    for _ in range(200):
+        popularity_counters.record_cart_add(runner_up["_id"])
+    assert run(popularity_counters.flush, db) == 1
+
+    async def rebuilt():
+        await homepage_snapshot._task
+
+    run(rebuilt)
+    fresh = client.get("/api/home", headers={"If-None-Match": response.headers["etag"]})
+    assert fresh.status_code == 200
+    assert fresh.json()["categories"][0]["products"][0]["_id"] == runner_up["_id"]
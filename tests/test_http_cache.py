@@ -0,0 +1,46 @@
+from bson import ObjectId
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    product = product_doc(_id=ObjectId(), name="Reviewed")
+    run(db.products.insert_one, product)
+    return str(product["_id"])
+
+
+def test_product_and_listing_revalidate_with_304(client, run, db):
+    product_id = _seed(run, db)
+    for url in (f"/api/products/{product_id}", "/api/products", "/api/categories"):
+        first = client.get(url)
+        etag = first.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_review_changes_product_and_listing_validators(client, run, db, user_headers, admin_headers):
+    product_id = _seed(run, db)
+    product_etag = client.get(f"/api/products/{product_id}").headers["etag"]
+    listing = client.get("/api/products", params={"sort_by": "rating"})
+
+    response = client.post(f"/api/products/{product_id}/reviews", headers=user_headers,
+                           json={"rating": 4, "comment": "Bun"})
+    assert response.status_code == 201
+    review_id = response.json()["_id"]
+
+    product = client.get(f"/api/products/{product_id}", headers={"If-None-Match": product_etag})
+    assert product.status_code == 200
+    assert product.json()["rating"] == 4 and product.json()["reviews"] == 1
+    relisted = client.get("/api/products", params={"sort_by": "rating"},
+                          headers={"If-None-Match": listing.headers["etag"]})
+    assert relisted.status_code == 200
+    assert relisted.json()[0]["reviews"] == 1
+
+    updated = client.put(f"/api/products/reviews/{review_id}", headers=user_headers, json={"rating": 2})
+    assert updated.status_code == 200
+    assert client.get("/api/products").json()[0]["rating"] == 2
+
+    etag = client.get(f"/api/products/{product_id}").headers["etag"]
+    assert client.delete(f"/api/products/reviews/{review_id}", headers=admin_headers).status_code == 204
+    product = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert product.status_code == 200
+    assert product.json()["reviews"] == 0
@@ -0,0 +1,37 @@
+from pymongo import ASCENDING, DESCENDING
+
+from tests.helpers import run_async
+
+
+def _index(collection, name):
+    from utils.indexes import INDEX_REGISTRY
+    return next(model.document for model in INDEX_REGISTRY[collection] if model.document["name"] == name)
+
+
+def test_discounted_index_matches_listing_sort():
+    spec = _index("products", "discounted_createdAt")
+    assert list(spec["key"].items()) == [("createdAt", DESCENDING), ("_id", DESCENDING)]
+    assert spec["partialFilterExpression"] == {"discount": {"$gt": 0}}
+
+
+def test_every_index_is_named_once_per_collection():
+    from utils.indexes import INDEX_REGISTRY
+    for collection, models in INDEX_REGISTRY.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), collection
+
+
+def test_ensure_indexes_creates_missing_and_keeps_unexpected(db):
+    from utils.indexes import INDEX_REGISTRY, ensure_indexes, check_index_drift
+
+    async def scenario():
+        await db.carts.create_index([("legacy", ASCENDING)], name="legacy")
+        await ensure_indexes(db)
+        return await check_index_drift(db), await db.carts.index_information()
+
+    report, cart_indexes = run_async(scenario())
+    for collection, models in INDEX_REGISTRY.items():
+        assert report[collection]["missing"] == [], collection
+    # Indexes outside the registry are reported, never dropped
+    assert report["carts"]["unexpected"] == ["legacy"]
+    assert "legacy" in cart_indexes
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from utils.inventory import InsufficientStock, release_stock, reserve_stock
+
+from tests.helpers import product_doc, run_async
+
+ADDRESS = {"name": "Ion", "phone": "0700000000", "address": "Str. 1", "city": "Cluj", "county": "CJ"}
+
+
+def _order(*lines):
+    return {
+        "items": [
+            {"productId": product_id, "name": "x", "price": 0, "quantity": quantity, "image": ""}
+            for product_id, quantity in lines
+        ],
+        "shippingAddress": ADDRESS,
+    }
+
+
+def test_reserve_and_release_set_updated_at():
+    async def scenario():
+        db = AsyncMongoMockClient()["r32_inventory"]
+        old = datetime(2020, 1, 1)
+        await db.products.insert_many([
+            product_doc(_id="a", stock=2, updatedAt=old),
+            product_doc(_id="b", stock=1, updatedAt=old),
+        ])
+        with pytest.raises(InsufficientStock) as error:
+            await reserve_stock(db, {"a": 1, "b": 5}, "ORD-1", available={"b": 1})
+        assert error.value.shortages == [{"productId": "b", "requested": 5, "available": 1}]
+
+        a = await db.products.find_one({"_id": "a"})
+        # The partial reservation was given back, and the product says so
+        assert a["stock"] == 2 and a["inStock"] is True and a["reservations"] == []
+        assert a["updatedAt"] > old
+        assert (await db.products.find_one({"_id": "b"}))["updatedAt"] == old
+
+        await reserve_stock(db, {"b": 1}, "ORD-2")
+        b = await db.products.find_one({"_id": "b"})
+        assert b["stock"] == 0 and b["inStock"] is False and b["updatedAt"] > old
+        assert await release_stock(db, {"b": 1}, "ORD-2") == 1
+        assert await release_stock(db, {"b": 1}, "ORD-2") == 0
+
+    run_async(scenario())
+
+
+def test_order_changes_product_and_listing_validators(client, run, db, user_headers):
+    product = product_doc(_id=ObjectId(), stock=5)
+    run(db.products.insert_one, product)
+    product_id = str(product["_id"])
+    etag = client.get(f"/api/products/{product_id}").headers["etag"]
+    listing_etag = client.get("/api/products").headers["etag"]
+
+    response = client.post("/api/orders", headers=user_headers, json=_order((product_id, 2)))
+    assert response.status_code == 201
+
+    fresh = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.json()["stock"] == 3
+    listing = client.get("/api/products", headers={"If-None-Match": listing_etag})
+    assert listing.status_code == 200 and listing.json()[0]["stock"] == 3
+
+
+def test_stock_is_released_when_the_order_cannot_be_stored(client, run, db, user_headers, monkeypatch):
+    product = product_doc(stock=5)
+    run(db.products.insert_one, product)
+
+    collection_class = type(db.orders)
+    insert_one = collection_class.insert_one
+
+    async def failing_insert(collection, document, *args, **kwargs):
+        if collection.name == "orders":
+            raise RuntimeError("write failed")
+        return await insert_one(collection, document, *args, **kwargs)
+
+    # Collections are fresh wrapper objects on every access, so patch the class
+    monkeypatch.setattr(collection_class, "insert_one", failing_insert)
+    with pytest.raises(RuntimeError):
+        client.post("/api/orders", headers=user_headers, json=_order((product["_id"], 2)))
+    stored = run(db.products.find_one, {"_id": product["_id"]})
+    assert stored["stock"] == 5 and stored["reservations"] == []
+
+
+def test_insufficient_stock_returns_409_and_keeps_stock(client, run, db, user_headers):
+    plenty, scarce = product_doc(stock=5), product_doc(stock=1)
+    run(db.products.insert_many, [plenty, scarce])
+    response = client.post("/api/orders", headers=user_headers, json=_order((plenty["_id"], 1), (scarce["_id"], 2)))
+    assert response.status_code == 409
+    assert response.json()["detail"]["items"] == [{"productId": scarce["_id"], "requested": 2, "available": 1}]
+    assert run(db.products.find_one, {"_id": plenty["_id"]})["stock"] == 5
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+from tests.helpers import product_doc
+
+PRICE_SORT = [("price", 1), ("_id", 1)]
+
+
+def _cursor(payload) -> str:
+    raw = payload if isinstance(payload, str) else json.dumps(payload)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_round_trip_keeps_types():
+    created = datetime(2024, 5, 1, 12, 30)
+    sort = [("createdAt", -1), ("_id", -1)]
+    cursor = encode_cursor("createdAt", sort, {"createdAt": created, "_id": "abc"})
+    assert decode_cursor(cursor, "createdAt", sort) == [created, "abc"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    _cursor("not json"),
+    _cursor({"s": "price_asc", "v": [{"$oid": "zz"}, "x"]}),
+    _cursor({"s": "price_asc", "v": [1]}),
+    _cursor({"s": "price_asc", "v": [{"$ne": None}, "x"]}),
+    _cursor({"s": "price_asc", "v": [[1, 2], "x"]}),
+    _cursor({"s": "price_asc", "v": ["cheap", "x"]}),
+    _cursor({"s": "price_asc", "v": [True, "x"]}),
+    _cursor({"s": "name", "v": ["a", "x"]}),
+    _cursor([1, 2]),
+])
+def test_tampered_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "price_asc", PRICE_SORT)
+
+
+def test_keyset_filter_handles_missing_values():
+    assert keyset_filter(PRICE_SORT, [None, "a"]) == {"$or": [
+        {"price": {"$ne": None}},
+        {"$and": [{"price": None}, {"_id": {"$gt": "a"}}]},
+    ]}
+
+
+def test_tampered_cursor_returns_400(client):
+    for payload in ({"s": "price_asc", "v": [{"$oid": "zz"}, "x"]}, {"s": "price_asc", "v": [{"$gt": 0}, "x"]}):
+        response = client.get("/api/products", params={"sort_by": "price_asc", "cursor": _cursor(payload)})
+        assert response.status_code == 400
+
+
+def test_cursor_pages_cover_the_listing_once(client, run, db):
+    docs = [product_doc(name=f"P{i}", price=float(i % 4), category="pagination", categoryPath=["pagination"])
+            for i in range(9)]
+    run(db.products.insert_many, docs)
+    seen = []
+    params = {"category": "pagination", "sort_by": "price_asc", "limit": 4}
+    while True:
+        response = client.get("/api/products", params=params)
+        seen += [product["_id"] for product in response.json()]
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+    expected = sorted(docs, key=lambda doc: (doc["price"], doc["_id"]))
+    assert seen == [doc["_id"] for doc in expected]
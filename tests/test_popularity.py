@@ -0,0 +1,47 @@
+from utils.http_cache import catalog_version
+from utils.popularity import EPOCH, HALF_LIFE_SECONDS, decay_factor, popularity_counters
+from utils.response_cache import listing_cache
+
+from tests.helpers import product_doc
+
+
+def test_decay_doubles_every_half_life():
+    assert decay_factor(EPOCH) == 1.0
+    assert decay_factor(EPOCH + 2 * HALF_LIFE_SECONDS) == 4.0
+
+
+def test_flush_reorders_cached_popular_listings(client, run, db):
+    first, second = product_doc(name="First", popularity=2.0), product_doc(name="Second", popularity=1.0)
+    run(db.products.insert_many, [first, second])
+    params = {"sort_by": "popular"}
+    listing = client.get("/api/products", params=params)
+    assert [product["name"] for product in listing.json()] == ["First", "Second"]
+    other = client.get("/api/products", params={"sort_by": "name"})
+
+    for _ in range(3):
+        popularity_counters.record_view(second["_id"])
+    assert run(popularity_counters.flush, db) == 1
+    stored = run(db.products.find_one, {"_id": second["_id"]})
+    assert stored["views"] == 3 and stored["popularity"] > 2.0
+
+    relisted = client.get("/api/products", params=params, headers={"If-None-Match": listing.headers["etag"]})
+    assert relisted.status_code == 200
+    assert [product["name"] for product in relisted.json()] == ["Second", "First"]
+    # Other orderings keep their cache entry and validator
+    hits = listing_cache.hits
+    assert client.get("/api/products", params={"sort_by": "name"},
+                      headers={"If-None-Match": other.headers["etag"]}).status_code == 304
+    client.get("/api/products", params={"sort_by": "name"})
+    assert listing_cache.hits == hits + 1
+
+
+def test_flush_without_changes_keeps_popular_listings(client, run, db):
+    run(db.products.insert_one, product_doc())
+    client.get("/api/products", params={"sort_by": "popular"})
+    version = catalog_version.etag("popularity", key="")
+    popularity_counters.record_view("deleted-product")
+    run(popularity_counters.flush, db)
+    assert catalog_version.etag("popularity", key="") == version
+    hits = listing_cache.hits
+    client.get("/api/products", params={"sort_by": "popular"})
+    assert listing_cache.hits == hits + 1
@@ -0,0 +1,35 @@
+from bson import ObjectId
+
+from routers.products import MAX_BATCH_IDS
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    api_product = product_doc(_id=ObjectId(), name="API")
+    seed_product = product_doc(name="Seed")
+    # Seed data may hold 24-hex string ids too
+    hex_string_product = product_doc(_id=str(ObjectId()), name="Hex")
+    run(db.products.insert_many, [api_product, seed_product, hex_string_product])
+    return [str(api_product["_id"]), seed_product["_id"], hex_string_product["_id"]]
+
+
+def test_batch_keeps_order_and_reports_missing(client, run, db):
+    ids = _seed(run, db)
+    requested = [ids[2], "nope", ids[0], ids[1], ids[0]]
+    body = client.get("/api/products/batch", params={"ids": ",".join(requested)}).json()
+    assert [product["_id"] for product in body["products"]] == [ids[2], ids[0], ids[1]]
+    assert body["missing"] == ["nope"]
+
+
+def test_post_batch_with_card_view(client, run, db):
+    ids = _seed(run, db)
+    body = client.post("/api/products/batch", json={"ids": ids[::-1], "view": "card"}).json()
+    assert [product["name"] for product in body["products"]] == ["Hex", "Seed", "API"]
+    assert "description" not in body["products"][0]
+
+
+def test_batch_size_is_bounded(client):
+    ids = [str(ObjectId()) for _ in range(MAX_BATCH_IDS + 1)]
+    assert client.post("/api/products/batch", json={"ids": ids}).status_code == 400
+    assert client.post("/api/products/batch", json={"ids": ids[:-1]}).json()["missing"] == ids[:-1]
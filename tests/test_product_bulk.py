@@ -0,0 +1,67 @@
+from bson import ObjectId
+
+from utils import catalog_events
+from utils.category_stats import category_stats
+from utils.search import search_index
+from utils.suggest import suggest_index
+from utils.similarity import similarity_index
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    products = [product_doc(_id=ObjectId(), name=f"Laptop {i}", brand="Acer", price=1000.0 + i) for i in range(3)]
+    run(db.products.insert_many, products)
+    # Inserted behind the API's back, so load everything the app keeps in memory
+    for index in (search_index, suggest_index, similarity_index):
+        run(index.rebuild, db)
+    run(category_stats.refresh, db)
+    return [str(product["_id"]) for product in products]
+
+
+def _forbid_rebuilds(monkeypatch):
+    async def rebuild(db):
+        raise AssertionError("bulk price updates must not rebuild the catalog indexes")
+    for index in (search_index, suggest_index, similarity_index):
+        monkeypatch.setattr(index, "rebuild", rebuild)
+
+
+def test_price_updates_refresh_listings_without_rebuilding_indexes(client, run, db, admin_headers, monkeypatch):
+    ids = _seed(run, db)
+    _forbid_rebuilds(monkeypatch)
+    listing = client.get("/api/products", params={"sort_by": "price_asc"})
+    assert client.get("/api/categories/stats").json()["laptopuri"]["minPrice"] == 1000.0
+
+    response = client.patch("/api/products/bulk", headers=admin_headers, json={
+        "updates": [{"id": ids[2], "price": 10.0}, {"id": ids[0], "stock": 0}]
+    })
+    assert response.json()["modified"] == 2
+
+    relisted = client.get("/api/products", params={"sort_by": "price_asc"},
+                          headers={"If-None-Match": listing.headers["etag"]})
+    assert relisted.status_code == 200
+    assert relisted.json()[0]["_id"] == ids[2]
+    suggested = client.get("/api/products/suggest", params={"q": "laptop"}).json()["products"]
+    assert {product["_id"]: product["price"] for product in suggested}[ids[2]] == 10.0
+
+    run(category_stats.refresh, db, ["laptopuri"])
+    assert client.get("/api/categories/stats").json()["laptopuri"]["minPrice"] == 10.0
+
+
+def test_filter_updates_reindex_renamed_products(client, run, db, admin_headers):
+    ids = _seed(run, db)
+    response = client.patch("/api/products/bulk", headers=admin_headers, json={
+        "filter": {"brand": "Acer"}, "set": {"brand": "Predator"}
+    })
+    assert response.json()["modified"] == 3
+    assert {str(product_id) for product_id, _ in search_index.search("predator")} == set(ids)
+    assert search_index.search("acer") == []
+
+
+def test_large_bulk_writes_rebuild_similarity_in_the_background(run, monkeypatch):
+    calls = []
+    monkeypatch.setattr(catalog_events, "_run_in_background", lambda coro, description: (calls.append(description), coro.close()))
+    monkeypatch.setattr(similarity_index, "upsert", lambda product: calls.append("upsert"))
+    products = [product_doc() for _ in range(catalog_events.SIMILARITY_UPSERT_LIMIT + 1)]
+    run(catalog_events.products_bulk_updated, None, products, {"price", "updatedAt"})
+    assert calls == ["Similarity index rebuild"]
@@ -0,0 +1,57 @@
+import io
+
+from utils.product_import import ProductImporter, detect_format, iter_rows
+
+from tests.helpers import run_async
+
+CSV = (
+    "sku,name,category,brand,price,stock,images\n"
+    "A1,Laptop A,laptopuri,Acer,2999,5,a.jpg|b.jpg\n"
+    "A2,Laptop B,laptopuri,Acer,not-a-price,1,\n"
+    "A3,Laptop C,laptopuri,Asus,3999,,\n"
+    "A1,Laptop A v2,laptopuri,Acer,2899,4,\n"
+).encode("utf-8")
+
+
+def test_detect_format():
+    assert detect_format("feed.CSV") == "csv"
+    assert detect_format("feed.jsonl") == "ndjson"
+    assert detect_format("feed.xml") is None
+
+
+def test_csv_rows_are_parsed_and_lists_split():
+    rows = list(iter_rows(io.BytesIO(CSV), "csv"))
+    assert rows[0] == (2, {"sku": "A1", "name": "Laptop A", "category": "laptopuri", "brand": "Acer",
+                           "price": "2999", "stock": "5", "images": ["a.jpg", "b.jpg"]})
+    # Empty cells are left out so updates do not overwrite them
+    assert "stock" not in rows[2][1]
+
+
+def test_import_reports_bad_rows_and_upserts_by_key(client, run, db, admin_headers):
+    response = client.post("/api/products/import", headers=admin_headers,
+                           files={"file": ("feed.csv", CSV, "text/csv")}, params={"batch_size": 2})
+    report = response.json()
+    assert response.status_code == 200
+    assert (report["processed"], report["inserted"], report["failed"]) == (4, 2, 1)
+    assert report["errors"][0]["line"] == 3
+
+    stored = run(db.products.find_one, {"sku": "A1"})
+    assert stored["name"] == "Laptop A v2" and stored["stock"] == 4
+    assert stored["rating"] == 0.0 and stored["categoryPath"] == ["laptopuri"]
+
+    # A second feed only touches the columns it carries
+    feed = b'{"sku": "A3", "name": "Laptop C", "category": "laptopuri", "brand": "Asus", "price": 3799}\n{bad json\n'
+    report = client.post("/api/products/import", headers=admin_headers,
+                         files={"file": ("feed.ndjson", feed, "application/x-ndjson")}).json()
+    assert (report["updated"], report["failed"]) == (1, 1)
+    updated = run(db.products.find_one, {"sku": "A3"})
+    assert updated["price"] == 3799 and updated["stock"] == 0
+
+
+def test_import_requires_the_key_column():
+    from mongomock_motor import AsyncMongoMockClient
+
+    importer = ProductImporter(AsyncMongoMockClient()["r32_import"], key="slug")
+    rows = [(1, {"name": "X", "category": "c", "brand": "b", "price": 1})]
+    report = run_async(importer.run(rows))
+    assert report["failed"] == 1 and "slug" in report["errors"][0]["error"]
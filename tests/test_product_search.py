@@ -0,0 +1,56 @@
+from utils.search import search_index
+
+from tests.helpers import product_doc
+
+
+def _seed(run, db, docs):
+    run(db.products.insert_many, docs)
+    run(search_index.rebuild, db)
+
+
+def test_filters_apply_to_every_search_hit(client, run, db):
+    # More hits than any page; the only cheap one ranks last (term in the description only)
+    docs = [product_doc(name=f"Ultrabook {i}", price=5000.0) for i in range(1200)]
+    cheap = product_doc(name="Accesoriu", description="husa ultrabook", price=50.0)
+    _seed(run, db, docs + [cheap])
+
+    response = client.get("/api/products", params={"search": "ultrabook", "max_price": 100})
+    assert response.status_code == 200
+    assert [product["_id"] for product in response.json()] == [cheap["_id"]]
+
+    facets = client.get("/api/products/facets", params={"search": "ultrabook", "price_buckets": "0,1000,10000"}).json()
+    assert facets["total"] == 1201
+
+
+def test_relevance_pages_follow_the_ranking(client, run, db):
+    docs = [product_doc(name=f"Monitor {i}", description="monitor " * (i % 3)) for i in range(30)]
+    _seed(run, db, docs)
+    ranked = search_index.ranked_ids("monitor")
+
+    first = client.get("/api/products", params={"search": "monitor", "limit": 10}).json()
+    second = client.get("/api/products", params={"search": "monitor", "limit": 10, "skip": 10}).json()
+    assert [product["_id"] for product in first + second] == ranked[:20]
+
+
+def test_products_without_in_stock_field_count_as_in_stock(client, run, db):
+    seeded = product_doc(name="Seed")
+    sold_out = product_doc(name="Sold out", inStock=False, stock=0)
+    run(db.products.insert_many, [seeded, sold_out])
+
+    listed = client.get("/api/products", params={"in_stock": True}).json()
+    assert [product["_id"] for product in listed] == [seeded["_id"]]
+    listed = client.get("/api/products", params={"in_stock": False}).json()
+    assert [product["_id"] for product in listed] == [sold_out["_id"]]
+    facets = client.get("/api/products/facets", params={"price_buckets": "0,1000"}).json()
+    assert facets["inStock"] == 1
+
+
+def test_prefix_search_lists_every_matching_product(client, run, db):
+    docs = [product_doc(name=f"te{i:03d}x") for i in range(80)]
+    televizor = product_doc(name="Televizor Samsung")
+    _seed(run, db, docs + [televizor])
+
+    listed = client.get("/api/products", params={"search": "te", "limit": 100}).json()
+    assert len(listed) == 81 and televizor["_id"] in [product["_id"] for product in listed]
+    facets = client.get("/api/products/facets", params={"search": "te", "price_buckets": "0,1000"}).json()
+    assert facets["total"] == 81
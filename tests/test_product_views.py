@@ -0,0 +1,32 @@
+from tests.helpers import product_doc
+
+
+def _seed(run, db):
+    # Seed data stores whole-number prices as ints
+    product = product_doc(name="Monitor", price=3931, discount=0, oldPrice=None)
+    run(db.products.insert_one, product)
+    return product
+
+
+def test_fields_view_is_coerced_like_the_full_model(client, run, db):
+    product = _seed(run, db)
+    full = client.get("/api/products").json()[0]
+    sparse = client.get("/api/products", params={"fields": "name,price,oldPrice,createdAt"}).json()[0]
+
+    assert sparse == {key: full[key] for key in ("_id", "name", "price", "oldPrice", "createdAt")}
+    assert isinstance(sparse["price"], float)
+    assert sparse["_id"] == product["_id"]
+
+
+def test_fields_view_rejects_unknown_fields(client):
+    response = client.get("/api/products", params={"fields": "name,secret"})
+    assert response.status_code == 400
+
+
+def test_card_view_and_batch_lookup(client, run, db):
+    product = _seed(run, db)
+    card = client.get("/api/products", params={"view": "card"}).json()[0]
+    assert set(card) == {"_id", "name", "price", "oldPrice", "image", "rating", "discount"}
+
+    batch = client.get("/api/products/batch", params={"ids": f"{product['_id']},missing", "fields": "price"}).json()
+    assert batch == {"products": [{"_id": product["_id"], "price": 3931.0}], "missing": ["missing"]}
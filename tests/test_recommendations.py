@@ -0,0 +1,67 @@
+import math
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from utils import recommendations
+from utils.recommendations import CoPurchaseIndex, co_purchase_index
+
+from tests.helpers import product_doc, run_async
+
+ORDERS = [["a", "b"], ["a", "b", "c"], ["a", "c"], ["d"]]
+
+
+def _order(product_ids, status="pending"):
+    return {"status": status, "items": [{"productId": product_id, "quantity": 1} for product_id in product_ids]}
+
+
+def _rebuilt(orders) -> CoPurchaseIndex:
+    async def build():
+        db = AsyncMongoMockClient()["r32_recommendations"]
+        await db.orders.insert_many([_order(items) for items in orders] + [_order(["a", "d"], "cancelled")])
+        index = CoPurchaseIndex()
+        await index.rebuild(db)
+        return index
+
+    return run_async(build())
+
+
+def test_scores_are_cosine_of_order_sets():
+    index = _rebuilt(ORDERS)
+    related = dict(index.related("b"))
+    # b is in 2 orders, a in 3, both together in 2; cancelled orders are ignored
+    assert related["a"] == pytest.approx(2 / math.sqrt(2 * 3))
+    assert related["c"] == pytest.approx(1 / math.sqrt(2 * 2))
+    assert [product_id for product_id, _ in index.related("b")] == ["a", "c"]
+    assert index.related("d") == []
+    assert index.related("unknown") == []
+
+
+@pytest.mark.parametrize("threshold", [10 ** 9, 1])
+def test_incremental_orders_match_a_rebuild(monkeypatch, threshold):
+    # threshold=1 compacts the delta into the CSR arrays after every order
+    monkeypatch.setattr(recommendations, "COMPACT_THRESHOLD", threshold)
+    index = _rebuilt(ORDERS[:2])
+    for items in ORDERS[2:] + [["e", "a"]]:
+        index.add_order([{"productId": product_id} for product_id in items])
+    expected = _rebuilt(ORDERS + [["e", "a"]])
+    for product_id in "abcde":
+        got, want = index.related(product_id), expected.related(product_id)
+        assert [key for key, _ in got] == [key for key, _ in want]
+        assert [score for _, score in got] == pytest.approx([score for _, score in want])
+
+
+def test_related_endpoint_after_an_order(client, run, db, user_headers):
+    laptop, mouse = product_doc(name="Laptop"), product_doc(name="Mouse")
+    run(db.products.insert_many, [laptop, mouse])
+    address = {"name": "Ion", "phone": "0700", "address": "Str. 1", "city": "Cluj", "county": "CJ"}
+    response = client.post("/api/orders", headers=user_headers, json={
+        "items": [{"productId": product["_id"], "name": "x", "price": 0, "quantity": 1, "image": ""}
+                  for product in (laptop, mouse)],
+        "shippingAddress": address,
+    })
+    assert response.status_code == 201
+
+    related = client.get(f"/api/products/{laptop['_id']}/related").json()
+    assert [card["name"] for card in related] == ["Mouse"]
+    assert co_purchase_index.related(mouse["_id"])[0][0] == laptop["_id"]
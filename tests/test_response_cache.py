@@ -0,0 +1,73 @@
+from bson import ObjectId
+
+from utils.response_cache import ResponseCache, listing_cache, product_matches
+
+from tests.helpers import product_doc
+
+
+def _product(**fields):
+    return {"_id": "p1", "price": 100.0, "category": "laptopuri", "categoryPath": ["laptopuri"], **fields}
+
+
+def test_product_matches_filters():
+    product = _product(brand="Acer", featured=True)
+    assert product_matches({"category": "laptopuri", "brand": "Acer"}, product)
+    assert not product_matches({"brand": "Dell"}, product)
+    assert not product_matches({"min_price": 150}, product)
+    assert not product_matches({"discount": True}, product)
+    assert product_matches({"search": "anything"}, product)
+
+
+def test_invalidation_is_precise():
+    cache = ResponseCache()
+    cache.set("laptops", b"[1]", {"category": "laptopuri"}, [_product()])
+    cache.set("phones", b"[2]", {"category": "telefoane"}, [_product(_id="p2", categoryPath=["telefoane"])])
+
+    # A new laptop lands in the laptop listing only
+    assert cache.invalidate_product(None, _product(_id="p3")) == 1
+    assert cache.get("laptops") is None
+    assert cache.get("phones") is not None
+    # A product moving out of a listing drops it as well
+    cache.set("laptops", b"[1]", {"category": "laptopuri"}, [_product()])
+    assert cache.invalidate_product(_product(), _product(categoryPath=["telefoane"])) == 2
+
+
+def test_bounded_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.set("a", b"12345", {}, [])
+    cache.set("b", b"12345", {}, [])
+    cache.get("a")
+    cache.set("c", b"1", {}, [])
+    assert cache.get("b") is None and cache.get("a") is not None
+    cache.set("huge", b"x" * 11, {}, [])
+    assert cache.get("huge") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    import utils.response_cache as module
+
+    cache = ResponseCache(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    cache.set("a", b"[]", {}, [])
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+def test_anonymous_listing_is_served_from_memory_until_a_write(client, run, db, admin_headers):
+    product = product_doc(_id=ObjectId(), name="Cached")
+    run(db.products.insert_one, product)
+
+    first = client.get("/api/products")
+    hits = listing_cache.hits
+    second = client.get("/api/products")
+    assert second.content == first.content
+    assert listing_cache.hits == hits + 1
+
+    response = client.put(f"/api/products/{product['_id']}", headers=admin_headers, json={"name": "Renamed"})
+    assert response.status_code == 200
+    assert client.get("/api/products").json()[0]["name"] == "Renamed"
+
+    stats = client.get("/api/admin/cache", headers=admin_headers).json()["listings"]
+    assert stats["invalidations"] >= 1
@@ -0,0 +1,76 @@
+import pytest
+
+from utils.search import ProductSearchIndex, fold_text, tokenize
+
+PRODUCTS = [
+    {"_id": "1", "name": "Televizor Samsung 55", "brand": "Samsung", "category": "televizoare",
+     "description": "Smart TV 4K cu HDR si sunet Dolby"},
+    {"_id": "2", "name": "Telefon Samsung Galaxy", "brand": "Samsung", "category": "telefoane",
+     "description": "Ecran mare"},
+    {"_id": "3", "name": "Laptop Lenovo", "brand": "Lenovo", "category": "laptopuri",
+     "description": "Laptop usor pentru birou, ideal pentru Samsung DeX si multe altele"},
+    {"_id": "4", "name": "Mașină de spălat", "brand": "Arctic", "category": "electrocasnice",
+     "description": ""},
+]
+
+
+def _index(products):
+    index = ProductSearchIndex()
+    for product in products:
+        index.upsert(product)
+    return index
+
+
+def test_fold_text_strips_romanian_diacritics():
+    assert fold_text("Mașină ŞŢ țară") == "masina st tara"
+    assert tokenize("Mașină de spălat!") == ["masina", "de", "spalat"]
+
+
+def test_prefix_and_diacritic_insensitive_match():
+    index = _index(PRODUCTS)
+    assert [key for key, _ in index.search("telev")] == ["1"]
+    assert [key for key, _ in index.search("masina spalat")] == ["4"]
+    assert index.search("samsung nokia") == []
+
+
+def test_scores_do_not_depend_on_insert_order():
+    forward = dict(_index(PRODUCTS).search("samsung"))
+    backward = dict(_index(reversed(PRODUCTS)).search("samsung"))
+    assert forward.keys() == backward.keys() == {"1", "2", "3"}
+    for key in forward:
+        assert forward[key] == pytest.approx(backward[key])
+
+
+def test_upserts_score_like_a_fresh_index():
+    index = _index(PRODUCTS)
+    # Churn: re-index and remove/re-add documents several times
+    for _ in range(3):
+        for product in PRODUCTS:
+            index.upsert(product)
+        index.remove("3")
+        index.upsert(PRODUCTS[2])
+    fresh = dict(_index(PRODUCTS).search("samsung"))
+    churned = dict(index.search("samsung"))
+    assert churned.keys() == fresh.keys()
+    for key in fresh:
+        assert churned[key] == pytest.approx(fresh[key])
+
+
+def test_name_match_outranks_description_match():
+    ranked = [key for key, _ in _index(PRODUCTS).search("samsung")]
+    assert ranked[-1] == "3"
+
+
+def test_removed_products_are_not_returned():
+    index = _index(PRODUCTS)
+    index.remove("1")
+    assert index.search("televizor") == []
+    assert len(index) == 3
+
+
+def test_prefix_matches_every_term_sharing_it():
+    # More terms start with "te" than any fixed expansion cap; "televizor" sorts last
+    products = [{"_id": str(i), "name": f"te{i:03d}x"} for i in range(80)]
+    index = _index(products + [{"_id": "tv", "name": "Televizor Samsung"}])
+    assert len(index.ranked_ids("te")) == 81
+    assert "tv" in index.ranked_ids("te")
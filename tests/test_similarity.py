@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from mongomock_motor import AsyncMongoMockClient
+
+from utils.similarity import SimilarityIndex
+
+from tests.helpers import product_doc, run_async
+
+
+def _catalog():
+    return [
+        product_doc(_id="gaming-1", name="Laptop gaming Nitro", brand="Acer", price=4000.0),
+        product_doc(_id="gaming-2", name="Laptop gaming Predator", brand="Acer", price=4500.0),
+        product_doc(_id="office", name="Laptop birou", brand="Dell", price=1500.0),
+        product_doc(_id="phone", name="Telefon Galaxy", brand="Samsung", price=4000.0,
+                    category="telefoane", categoryPath=["telefoane"]),
+    ]
+
+
+async def _rebuilt(products) -> SimilarityIndex:
+    db = AsyncMongoMockClient()["r32_similarity"]
+    await db.products.insert_many(products)
+    index = SimilarityIndex()
+    await index.rebuild(db)
+    return index
+
+
+def test_neighbours_stay_within_the_top_level_category():
+    index = run_async(_rebuilt(_catalog()))
+    assert [product_id for product_id, _ in index.similar("gaming-1")] == ["gaming-2", "office"]
+    assert index.similar("phone") == []
+
+
+def test_upserts_and_removes_match_a_rebuild():
+    catalog = _catalog()
+    index = run_async(_rebuilt(catalog[:2]))
+    for product in catalog[2:]:
+        index.upsert(product)
+    index.upsert({**catalog[2], "name": "Laptop gaming birou"})
+    index.remove("gaming-2")
+
+    expected = run_async(_rebuilt([catalog[0], {**catalog[2], "name": "Laptop gaming birou"}, catalog[3]]))
+    for product_id in ("gaming-1", "office", "phone"):
+        assert index.similar(product_id) == expected.similar(product_id)
+    assert index.similar("gaming-2") == []
+
+
+def test_rebuild_runs_off_the_event_loop(monkeypatch):
+    built_from = SimilarityIndex._built_from.__func__
+
+    def slow_build(cls, products):
+        time.sleep(0.3)
+        return built_from(cls, products)
+
+    monkeypatch.setattr(SimilarityIndex, "_built_from", classmethod(slow_build))
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        index = await _rebuilt(_catalog())
+        task.cancel()
+        return index, ticks
+
+    index, ticks = run_async(scenario())
+    assert ticks >= 10
+    assert len(index) == 4
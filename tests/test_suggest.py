@@ -0,0 +1,61 @@
+from utils.suggest import PrefixIndex, SuggestIndex, phrases_of
+
+from tests.helpers import product_doc
+
+
+def test_phrases_start_at_every_word():
+    assert phrases_of("Apple iPhone 15") == ["apple iphone 15", "iphone 15", "15"]
+
+
+def test_prefix_index_ranks_by_score_and_deduplicates_owners():
+    index = PrefixIndex()
+    index.load([
+        ("1", "Apple iPhone 15", {"id": "1"}, 1.0),
+        ("2", "Apple Watch", {"id": "2"}, 5.0),
+        ("3", "Samsung Galaxy", {"id": "3"}, 9.0),
+    ])
+    assert index.top("app", 5) == [{"id": "2"}, {"id": "1"}]
+    assert index.top("iph", 5) == [{"id": "1"}]
+
+    index.upsert("4", "Apple TV", {"id": "4"}, 7.0)
+    index.remove("2")
+    index.set_score("1", 8.0)
+    assert index.top("apple", 5) == [{"id": "1"}, {"id": "4"}]
+    assert index.top("", 5) == []
+
+
+def test_incremental_updates_match_a_rebuild(client, run, db):
+    products = [
+        product_doc(name="Laptop Lenovo Legion", brand="Lenovo", rating=4.5, reviews=10),
+        product_doc(name="Laptop Asus Rog", brand="Asus", rating=4.8, reviews=3),
+        product_doc(name="Lenovo Tab", brand="Lenovo", category="tablete", categoryPath=["tablete"]),
+    ]
+    run(db.products.insert_many, products)
+    rebuilt = SuggestIndex()
+    run(rebuilt.rebuild, db)
+
+    incremental = SuggestIndex()
+    incremental.ready = True
+    for product in products:
+        incremental.upsert(product)
+    incremental.upsert({**products[1], "rating": 5.0})
+    incremental.remove(products[1]["_id"])
+    incremental.upsert(products[1])
+
+    for prefix in ("lap", "len", "asus", "tab"):
+        assert run(incremental.suggest, db, prefix) == run(rebuilt.suggest, db, prefix)
+    lenovo = run(rebuilt.suggest, db, "len")
+    assert lenovo["brands"] == [{"name": "Lenovo", "count": 2}]
+    assert [product["name"] for product in lenovo["products"]] == ["Laptop Lenovo Legion", "Lenovo Tab"]
+
+
+def test_suggest_endpoint_follows_product_writes(client, run, db, admin_headers):
+    response = client.post("/api/products", headers=admin_headers, json={
+        "name": "Ventilator Turbo", "category": "electrocasnice", "brand": "Tefal", "price": 199
+    })
+    product_id = response.json()["_id"]
+    body = client.get("/api/products/suggest", params={"q": "turb"}).json()
+    assert [product["_id"] for product in body["products"]] == [product_id]
+
+    client.delete(f"/api/products/{product_id}", headers=admin_headers)
+    assert client.get("/api/products/suggest", params={"q": "turb"}).json()["products"] == []
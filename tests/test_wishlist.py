@@ -0,0 +1,42 @@
+from bson import ObjectId
+
+from tests.helpers import product_doc
+
+
+def test_missing_wishlist_is_virtual(client, run, db, user_headers):
+    response = client.get("/api/wishlist", headers=user_headers)
+    assert response.status_code == 200
+    assert response.json()["products"] == []
+    response = client.delete("/api/wishlist/anything", headers=user_headers)
+    assert response.json()["products"] == []
+    assert run(db.wishlists.count_documents, {}) == 0
+
+
+def test_add_and_remove(client, run, db, user_headers):
+    seeded, created = product_doc(), product_doc(_id=ObjectId())
+    run(db.products.insert_many, [seeded, created])
+
+    for product_id in (seeded["_id"], str(created["_id"]), seeded["_id"]):
+        response = client.post("/api/wishlist", headers=user_headers, json={"productId": product_id})
+        assert response.status_code == 200
+    assert response.json()["products"] == [seeded["_id"], str(created["_id"])]
+
+    response = client.post("/api/wishlist", headers=user_headers, json={"productId": "missing"})
+    assert response.status_code == 404
+
+    response = client.delete(f"/api/wishlist/{seeded['_id']}", headers=user_headers)
+    assert response.json()["products"] == [str(created["_id"])]
+    assert run(db.wishlists.count_documents, {}) == 1
+
+
+def test_listing_marks_wishlisted_products(client, run, db, user_headers):
+    liked, other = product_doc(name="Liked"), product_doc(name="Other")
+    run(db.products.insert_many, [liked, other])
+    client.post("/api/wishlist", headers=user_headers, json={"productId": liked["_id"]})
+
+    listed = client.get("/api/products", headers=user_headers, params={"annotate": "wishlist"}).json()
+    assert {product["_id"]: product["inWishlist"] for product in listed} == {liked["_id"]: True, other["_id"]: False}
+
+    client.delete(f"/api/wishlist/{liked['_id']}", headers=user_headers)
+    listed = client.get("/api/products", headers=user_headers, params={"annotate": "wishlist"}).json()
+    assert not any(product["inWishlist"] for product in listed)